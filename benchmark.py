@@ -0,0 +1,212 @@
+'''Benchmarks das primitivas do projeto, sobre os dados de big_numbers/ e sobre
+entradas geradas com semente fixa. Cada caso é executado `--repeat` vezes, e o
+relatório traz mediana e percentis dos tempos. Os resultados podem ser salvos em
+JSON e comparados com uma linha de base salva anteriormente:
+
+    python benchmark.py --output bench_baseline.json
+    python benchmark.py --baseline bench_baseline.json
+
+A comparação marca como regressão todo caso cuja mediana passe de `--threshold`
+vezes a mediana da linha de base, e o programa termina com código 1 nesse caso.
+
+Os caches de módulo (tabelas de baby-steps, contextos do cálculo do índice e do
+TCR, geradores) são esvaziados antes de cada repetição, para que todas meçam o
+trabalho completo. Os casos do crivo quadrático medem a fatoração de ponta a
+ponta; um caso que estoura o prazo ou falha é registrado com o tempo gasto e o
+status ('timeout' ou 'error'), e um timeout guarda também o número de relações
+encontradas, que é comparado com a linha de base. Os casos mais caros (qs40 e
+qs45) só rodam por padrão com --slow.'''
+import argparse
+import json
+import platform
+import sys
+from random import Random
+from statistics import median, quantiles
+from time import perf_counter
+
+from src import discrete_log, index_calculus, modular_arithmetic
+from src.base import gcd_extended
+from src.discrete_log import baby_step_giant_step, pohlig_hellman
+from src.factorization import pollard_rho_factor, pollard_rho_prime_power_decomposition
+from src.modular_arithmetic import powmod, invmod, find_generator
+from src.primality import prime_miller_rabin, eratosthenes_sieve
+from src.quadratic_sieve import quadratic_sieve
+from src.util import Deadline, TimeoutExceeded
+
+SEED = 2024
+SLOW_CASES = {'qs40', 'qs45'}
+
+
+def read_vectors(name: str) -> list[list[int]]:
+    with open(f"big_numbers/{name}") as file:
+        return [[int(x) for x in line.split()] for line in file if line.strip()]
+
+def semiprime(digits: int, rng: Random) -> int:
+    '''Gera um semiprimo com `digits` algarismos, produto de dois primos de
+    tamanhos parecidos, a partir do gerador `rng`.'''
+    while True:
+        p = random_prime_digits(digits // 2, rng)
+        q = random_prime_digits(digits - digits // 2, rng)
+        if len(str(p * q)) == digits: return p * q
+
+def random_prime_digits(digits: int, rng: Random) -> int:
+    while True:
+        p = rng.randrange(10**(digits - 1), 10**digits) | 1
+        if prime_miller_rabin(p): return p
+
+def powmod_case():
+    vectors = read_vectors("exp_binaria.txt")
+    return lambda: [powmod(b, e, n) for b, e, n, _x in vectors]
+
+def gcd_extended_case():
+    vectors = read_vectors("extended_gcd.txt")
+    return lambda: [gcd_extended(a, b) for a, b, *_ in vectors]
+
+def invmod_case():
+    vectors = read_vectors("inverso_modular.txt")
+    return lambda: [invmod(a, n) for a, n, _inv in vectors]
+
+def miller_rabin_case():
+    vectors = read_vectors("primes.txt")
+    return lambda: [prime_miller_rabin(p) for p, _result in vectors]
+
+def sieve_case():
+    return lambda: eratosthenes_sieve(10**5)
+
+def rho_case():
+    rng = Random(SEED)
+    numbers = [semiprime(14, rng) for _ in range(5)]
+    return lambda: [pollard_rho_factor(n) for n in numbers]
+
+def bsgs_case():
+    vectors = read_vectors("bsgs.txt")
+    return lambda: [baby_step_giant_step(g, h, p, p - 1) for g, _x, h, p in vectors]
+
+def pohlig_hellman_case():
+    rng = Random(SEED)
+    p = random_prime_digits(12, rng)
+    f = pollard_rho_prime_power_decomposition(p - 1)
+    g = find_generator(p, p - 1, f)
+    targets = [powmod(g, rng.randrange(p - 1), p) for _ in range(5)]
+    return lambda: [pohlig_hellman(g, h, p, f) for h in targets]
+
+def quadratic_sieve_case(digits: int, timeout: float):
+    def setup():
+        n = semiprime(digits, Random(SEED + digits))
+        # Nos tamanhos maiores, 1024 candidatos por tick passam muito do prazo.
+        return lambda: quadratic_sieve(n, deadline=Deadline(timeout, every=32))
+    return setup
+
+def cases(qs_timeout: float) -> dict:
+    return {
+        'powmod': powmod_case,
+        'gcd_extended': gcd_extended_case,
+        'invmod': invmod_case,
+        'miller_rabin': miller_rabin_case,
+        'sieve': sieve_case,
+        'rho': rho_case,
+        'bsgs': bsgs_case,
+        'pohlig_hellman': pohlig_hellman_case,
+        **{f'qs{d}': quadratic_sieve_case(d, qs_timeout) for d in (20, 30, 40, 45)},
+    }
+
+def reset_caches():
+    # pylint: disable=protected-access
+    discrete_log._tables.clear()
+    index_calculus._contexts.clear()
+    modular_arithmetic._generators.clear()
+    modular_arithmetic.crt_context.cache_clear()
+
+def run_case(setup, repeat: int) -> dict:
+    '''Executa o caso `repeat` vezes e resume os tempos. A primeira execução que
+    estoura o prazo ou falha encerra o caso: o tempo dela entra no resumo, com o
+    status correspondente, sem interromper os demais casos.'''
+    run = setup()
+    times = []
+    result = {'status': 'ok'}
+    for _ in range(repeat):
+        reset_caches()
+        start = perf_counter()
+        try:
+            run()
+        except TimeoutExceeded as e:
+            result['status'] = 'timeout'
+            if isinstance(e.partial, dict) and 'relations' in e.partial:
+                result['relations'] = len(e.partial['relations'])
+        except (ArithmeticError, RuntimeError, ValueError) as e:
+            result['status'] = 'error'
+            result['error'] = repr(e)
+        times.append(perf_counter() - start)
+        if result['status'] != 'ok': break
+    cuts = quantiles(times, n=100, method='inclusive') if len(times) > 1 else times * 99
+    result.update({
+        'repeat': len(times),
+        'min': min(times),
+        'median': median(times),
+        'p90': cuts[89],
+        'p99': cuts[98],
+    })
+    return result
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    '''Compara com a linha de base os casos com o mesmo status: medianas, ou, entre
+    dois timeouts, o número de relações encontradas. Um caso que deixou de
+    terminar com 'ok' é sempre uma regressão.'''
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get(name)
+        if not old or 'median' not in old: continue
+        if old['status'] == 'ok' and result['status'] != 'ok':
+            regressions.append(f"{name}: {result['status']} (baseline {old['median'] * 1000:.3f}ms)")
+        elif old['status'] != result['status']:
+            continue
+        elif result['status'] == 'timeout' and 'relations' in old and 'relations' in result:
+            if result['relations'] * threshold < old['relations']:
+                regressions.append(f"{name}: {result['relations']} relações vs {old['relations']} no prazo")
+        elif result['median'] > threshold * old['median']:
+            ratio = result['median'] / old['median']
+            regressions.append(f"{name}: {result['median'] * 1000:.3f}ms vs {old['median'] * 1000:.3f}ms ({ratio:.2f}x)")
+    return regressions
+
+def main(argv: list[str]=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks das primitivas do projeto.")
+    parser.add_argument('cases', nargs='*', help="casos a executar (padrão: todos)")
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--qs-timeout', type=float, default=10)
+    parser.add_argument('--slow', action='store_true', help=f"inclui os casos {', '.join(sorted(SLOW_CASES))}")
+    parser.add_argument('--output', help="arquivo JSON onde salvar os resultados")
+    parser.add_argument('--baseline', help="arquivo JSON com resultados anteriores para comparação")
+    parser.add_argument('--threshold', type=float, default=1.25)
+    args = parser.parse_args(argv)
+
+    available = cases(args.qs_timeout)
+    selected = args.cases or [name for name in available if args.slow or name not in SLOW_CASES]
+    unknown = [name for name in selected if name not in available]
+    if unknown: parser.error(f"casos desconhecidos: {', '.join(unknown)}")
+
+    results = {}
+    for name in selected:
+        result = run_case(available[name], args.repeat)
+        results[name] = result
+        if result['status'] == 'ok':
+            print(f"{name:16} mediana {result['median'] * 1000:10.3f}ms  "
+                  f"p90 {result['p90'] * 1000:10.3f}ms  p99 {result['p99'] * 1000:10.3f}ms")
+        else:
+            detail = f"  {result['relations']} relações" if 'relations' in result else ''
+            print(f"{name:16} {result['status']:7} {result['median'] * 1000:10.3f}ms{detail}")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'python': platform.python_version(), 'results': results}, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print("Regressão:", line)
+        if regressions: return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
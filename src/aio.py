@@ -0,0 +1,148 @@
+'''Fachada assíncrona (asyncio) para os algoritmos pesados do projeto. Cada chamada
+roda num pool de processos gerenciado, com um limite de tarefas simultâneas, e
+pode ser cancelada: cancelar a tarefa que aguarda o resultado sinaliza um Event
+compartilhado, que o Deadline do processo de trabalho verifica nos seus laços.
+Chamadas idênticas em andamento são deduplicadas e compartilham um único job.
+Exemplo:
+async with Engine(workers=4) as engine:
+    d, (n, e, d_) = await asyncio.gather(engine.quadratic_sieve(87463),
+                                         engine.generate_keys(512))'''
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Manager
+
+from src.discrete_log import pohlig_hellman
+from src.modular_arithmetic import find_generator
+from src.quadratic_sieve import quadratic_sieve
+from src.rsa import generate_keys
+from src.util import Deadline, Powers
+
+
+_FUNCTIONS = {
+    'quadratic_sieve': quadratic_sieve,
+    'pohlig_hellman': pohlig_hellman,
+    'find_generator': find_generator,
+    'generate_keys': generate_keys,
+}
+
+
+def _run(name: str, args: tuple, kwargs: dict, timeout: float | None, event):
+    '''Executada no processo de trabalho: chama a função `name` com um Deadline
+    ligado ao Event de cancelamento.'''
+    return _FUNCTIONS[name](*args, deadline=Deadline(timeout, event=event), **kwargs)
+
+def _freeze(value):
+    '''Converte argumentos em uma chave hashable, para deduplicar chamadas.'''
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class _Job:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class Engine:
+    '''Executor assíncrono com `workers` processos e no máximo `max_concurrency`
+    jobs submetidos ao pool ao mesmo tempo (por padrão, um por processo); os demais
+    esperam a vez sem ocupar o pool. O pool e o Manager que cria os Events de
+    cancelamento são iniciados na primeira chamada e encerrados por
+    `await close()` ou ao sair do bloco `async with`.
+    Chamadas com os mesmos argumentos feitas enquanto um job igual está em
+    andamento aguardam esse mesmo job; ele só é cancelado quando todas as tarefas
+    que o aguardam forem canceladas. A geração de chaves RSA nunca é deduplicada,
+    pois cada chamada deve produzir uma chave diferente.'''
+    def __init__(self, workers: int=None, max_concurrency: int=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_concurrency = max_concurrency or self.workers
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._executor = None
+        self._manager = None
+        self._jobs: dict[tuple, _Job] = {}
+        self._events = set()
+        self._closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @property
+    def in_flight(self) -> int:
+        '''Número de jobs distintos em andamento ou aguardando vez.'''
+        return len(self._jobs)
+
+    async def close(self):
+        '''Cancela todos os jobs, inclusive os que ainda esperam vez, sinaliza os
+        processos de trabalho e encerra o pool sem bloquear o laço de eventos.
+        Chamadas feitas depois disso levantam RuntimeError.'''
+        self._closed = True
+        # Sinaliza já os processos de trabalho em andamento; cada job também
+        # sinaliza o seu Event ao receber o cancelamento.
+        for event in self._events:
+            event.set()
+        tasks = [job.task for job in self._jobs.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.to_thread(self._shutdown)
+
+    def _shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+    async def quadratic_sieve(self, n: int, timeout: float=15, **kwargs) -> int:
+        return await self._submit('quadratic_sieve', (n,), kwargs, timeout)
+
+    async def pohlig_hellman(self, g: int, h: int, n: int, f: Powers, timeout: float=None, **kwargs) -> int:
+        return await self._submit('pohlig_hellman', (g, h, n, f), kwargs, timeout)
+
+    async def find_generator(self, n: int, phi: int, f: Powers, timeout: float=15) -> int:
+        return await self._submit('find_generator', (n, phi, f), {}, timeout)
+
+    async def generate_keys(self, bits: int=1024, timeout: float=None) -> tuple[int, int, int]:
+        return await self._submit('generate_keys', (bits,), {}, timeout, dedupe=False)
+
+    async def _submit(self, name: str, args: tuple, kwargs: dict, timeout: float | None, dedupe: bool=True):
+        if self._closed: raise RuntimeError("Engine is closed.")
+        key = (name, _freeze(args), _freeze(kwargs), timeout) if dedupe else object()
+        job = self._jobs.get(key)
+        if job is None:
+            job = _Job(asyncio.create_task(self._execute(name, args, kwargs, timeout)))
+            self._jobs[key] = job
+            job.task.add_done_callback(lambda _task: self._jobs.pop(key, None))
+        job.waiters += 1
+        try:
+            return await asyncio.shield(job.task)
+        except asyncio.CancelledError:
+            if job.waiters == 1: job.task.cancel()
+            raise
+        finally:
+            job.waiters -= 1
+
+    async def _execute(self, name: str, args: tuple, kwargs: dict, timeout: float | None):
+        async with self._semaphore:
+            if self._closed: raise RuntimeError("Engine is closed.")
+            if self._executor is None:
+                self._manager = Manager()
+                self._executor = ProcessPoolExecutor(self.workers)
+            event = self._manager.Event()
+            self._events.add(event)
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(self._executor, _run, name, args, kwargs, timeout, event)
+            except asyncio.CancelledError:
+                event.set()
+                raise
+            finally:
+                self._events.discard(event)
@@ -0,0 +1,92 @@
+'''Seleção do backend aritmético. Se a biblioteca gmpy2 (GMP) estiver instalada,
+as primitivas marcadas com `@accelerated` passam a usar as rotinas da GMP;
+caso contrário, continuam com a implementação em Python puro. A escolha é feita
+uma única vez, na importação, e pode ser forçada para Python com a variável de
+ambiente ARITHMETIC_BACKEND=python.
+
+A implementação em Python continua acessível no atributo `python` de cada função:
+    from src.base import gcd
+    gcd(12, 18), gcd.python(12, 18) => (6, 6)
+
+Os resultados são sempre convertidos de volta para int, e os casos que a GMP
+trata de forma diferente (MDC de números negativos, módulos negativos, expoentes
+negativos, listas de primos explícitas) são repassados à implementação em Python.'''
+import os
+from functools import wraps
+
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
+BACKEND = 'gmpy2' if gmpy2 is not None and os.environ.get('ARITHMETIC_BACKEND') != 'python' else 'python'
+
+
+# A GMP sempre retorna o MDC positivo; em Python, o sinal depende das entradas.
+def _gcd(python):
+    def gcd(a, b):
+        if a < 0 or b < 0: return python(a, b)
+        return int(gmpy2.gcd(a, b))
+    return gcd
+
+def _gcd_extended(python):
+    def gcd_extended(a, b):
+        if a < 0 or b < 0: return python(a, b)
+        d, x, y = gmpy2.gcdext(a, b)
+        return int(d), int(x), int(y)
+    return gcd_extended
+
+def _iroot(python):
+    def iroot(n, k):
+        if n < 0 or k < 1: return python(n, k)
+        return int(gmpy2.iroot(n, k)[0])
+    return iroot
+
+def _isqrt(python):
+    def isqrt(n):
+        if n < 0: return python(n)
+        return int(gmpy2.isqrt(n))
+    return isqrt
+
+def _invmod(python):
+    def invmod(a, n):
+        if n < 2: return python(a, n)
+        try:
+            return int(gmpy2.invert(a, n))
+        except ZeroDivisionError:
+            return 0
+    return invmod
+
+def _powmod(python):
+    def powmod(b, e, n):
+        if n < 2 or e < 0: return python(b, e, n)
+        return int(gmpy2.powmod(b, e, n))
+    return powmod
+
+def _jacobi(python):
+    def jacobi(a, n):
+        if n < 1 or n % 2 == 0: return python(a, n)
+        return gmpy2.jacobi(a, n)
+    return jacobi
+
+def _prime_miller_rabin(python):
+    def prime_miller_rabin(n, primes=None, rep=None):
+        if primes is not None: return python(n, primes, rep)
+        n = abs(n)
+        return gmpy2.is_prime(n, rep or max(25, n.bit_length() // 3))
+    return prime_miller_rabin
+
+_IMPLEMENTATIONS = {f.__name__[1:]: f for f in (
+    _gcd, _gcd_extended, _iroot, _isqrt, _invmod, _powmod, _jacobi, _prime_miller_rabin)}
+
+
+def accelerated(f):
+    '''Decorador que troca f pela versão em gmpy2 de mesmo nome, se o backend
+    gmpy2 estiver ativo. Em ambos os casos, a versão em Python fica em `f.python`.'''
+    fast = _IMPLEMENTATIONS.get(f.__name__) if BACKEND == 'gmpy2' else None
+    if fast is None:
+        f.python = f
+        return f
+    wrapper = wraps(f)(fast(f))
+    wrapper.python = f
+    return wrapper
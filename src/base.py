@@ -1,43 +1,99 @@
+from src.backend import accelerated
+
+
+def ilog2(n:int) -> int:
+    '''Retorna o logaritmo inteiro de n na base 2, a partir do número de bits
+    de n. Complexidade: O(1).
+    Ex.: ilog2(1031) => 10'''
+    if n < 1: raise ValueError('n must be a positive integer.')
+    return n.bit_length() - 1
+
 def ilog10(n:int) -> int:
-    '''Retorna o logaritmo inteiro de n na base 10. Complexidade: O(log(n))
+    '''Retorna o logaritmo inteiro de n na base 10. A estimativa vem do número
+    de bits de n, com log10(2) aproximado por baixo com 15 casas, e fica no máximo
+    1 abaixo do valor para n de até 10^15 bits; assim, basta uma comparação com
+    uma potência de 10 para corrigi-la.
+    Complexidade: O(M(log(n))), onde M é o custo de uma multiplicação.
     Ex.: ilog10(1031) => 3'''
-    x = 0
-    while n >= 10:
-        n //= 10
-        x += 1
-    return x
+    if n < 10: return 0
+    x = ilog2(n) * 301029995663981 // 10**15		# 0.301029995663981 < log10(2)
+    return x + 1 if 10**(x + 1) <= n else x
 
+@accelerated
+def iroot(n: int, k: int) -> int:
+    '''Retorna a raiz k-ésima inteira x de n, x^k <= n < (x+1)^k, usando o
+    método de Newton a partir de uma estimativa por excesso dada pelo número de
+    bits de n. Complexidade: O(log(log(n))) iterações.
+    Exemplo: iroot(1000, 3) => 10'''
+    if n < 0: raise ValueError('n must be a non-negative integer.')
+    if k < 1: raise ValueError('k must be a positive integer.')
+    if n < 2 or k == 1: return n
+    x = 1 << -(-n.bit_length() // k)
+    while True:
+        y = ((k - 1) * x + n // x**(k - 1)) // k
+        if y >= x: return x
+        x = y
+
+@accelerated
 def isqrt(n: int) -> int:
-    '''Retorna a raiz quadrada inteira x de n, x² <= n, usando
-    busca binária. Complexidade: O(log(n)).
+    '''Retorna a raiz quadrada inteira x de n, x² <= n, usando o
+    método de Newton. Complexidade: O(log(log(n))) iterações.
     Exemplo: isqrt(51) => 7'''
-    L = 0
-    R = n + 1
-    while L != R - 1:
-        M = (L + R) // 2
-        if M * M <= n:
-            L = M
-        else:
-            R = M
-    return L
+    return iroot.python(n, 2)
+
+def _primes_up_to(m: int) -> list[int]:
+    sieve = bytearray([1]) * (m + 1)
+    sieve[:2] = b'\x00\x00'
+    for i in range(2, isqrt(m) + 1):
+        if sieve[i]: sieve[i * i::i] = bytes(len(range(i * i, m + 1, i)))
+    return [i for i, is_prime in enumerate(sieve) if is_prime]
 
+def perfect_power(n: int) -> tuple[int, int]:
+    '''Retorna r, k tais que n = r^k, com k o maior possível. Caso n não seja
+    uma potência perfeita, retorna n, 1. Basta testar expoentes primos: se
+    n = r^k, n também é potência p-ésima para todo primo p que divide k, e a
+    recursão sobre a raiz encontra o restante do expoente.
+    Complexidade: O(log(n) / log(log(n))) raízes inteiras.
+    Exemplo: perfect_power(7776) => (6, 5)'''
+    if n < 4: return n, 1
+    for k in _primes_up_to(n.bit_length()):
+        r = iroot(n, k)
+        if r < 2: break
+        if r**k == n:
+            r, j = perfect_power(r)
+            return r, j * k
+    return n, 1
+
+def is_perfect_power(n: int) -> bool:
+    '''Retorna True se n = r^k para algum r e algum k > 1.
+    Exemplo: is_perfect_power(343) => True'''
+    return perfect_power(n)[1] > 1
+
+@accelerated
 def gcd(a:int, b:int) -> int:
-    '''Implementa recursivamente o cálculo do MDC entre a e b
+    '''Implementa iterativamente o cálculo do MDC entre a e b
     usando o algoritmo de Euclides. Complexidade: O(log(min(a, b))).
     Exemplo: gcd(7178655232, 1426532525) => 997'''
-    if a == 0: return b
-    return gcd(b % a, a)
+    while a != 0:
+        a, b = b % a, a
+    return b
 
+@accelerated
 def gcd_extended(a:int, b:int) -> tuple[int, int, int]:
-    '''Implementa recursivamente o cálculo do MDC entre a e b
+    '''Implementa iterativamente o cálculo do MDC entre a e b
     usando o algoritmo de Euclides. Retorna x, y e d, tais que
-    a*x + b*y = d, onde d é o MDC entre a e b. 
+    a*x + b*y = d, onde d é o MDC entre a e b. Por ser iterativo, não esbarra
+    no limite de recursão com entradas grandes (chaves RSA de 2048 bits ou mais).
     Complexidade: O(log(min(a, b))).
     Exemplo: gcd_extended(7178655232, 1426532525) => (997, -39329, 197913)
     '''
-    if a == 0: return b, 0, 1
-    d, x, y = gcd_extended(b % a, a)
-    return d, y - b // a * x , x
+    x0, y0, x1, y1 = 0, 1, 1, 0
+    while a != 0:
+        q = b // a
+        a, b = b - q * a, a
+        x0, x1 = x1, x0 - q * x1
+        y0, y1 = y1, y0 - q * y1
+    return b, x0, y0
 
 def prod(nums: list[int]) -> int:
     '''Retorna o produto dos elementos em `nums`.
@@ -76,3 +132,24 @@ def oddify(n:int) -> tuple[int, int]:
         q >>= 1
         k += 1
     return k, q
+
+def product_tree(nums: list[int]) -> list[list[int]]:
+    '''Retorna a árvore de produtos de `nums`, nível a nível: o nível 0 são os
+    próprios números, e cada nível seguinte contém os produtos de pares
+    consecutivos do nível anterior, até restar apenas o produto total.
+    Exemplo: product_tree([2, 3, 5]) => [[2, 3, 5], [6, 5], [30]]'''
+    tree = [list(nums)]
+    while len(tree[-1]) > 1:
+        level = tree[-1]
+        tree.append([prod(level[i:i + 2]) for i in range(0, len(level), 2)])
+    return tree
+
+def remainder_tree(x: int, tree: list[list[int]]) -> list[int]:
+    '''Retorna [x mod n for n in tree[0]], descendo a árvore de produtos de
+    `product_tree()`: cada nó é reduzido a partir do resto do seu pai, de forma
+    que as divisões de números grandes ocorrem apenas perto da raiz.
+    Exemplo: remainder_tree(47, product_tree([2, 3, 5])) => [1, 2, 2]'''
+    rems = [x % tree[-1][0]]
+    for level in reversed(tree[:-1]):
+        rems = [rems[i // 2] % n for i, n in enumerate(level)]
+    return rems
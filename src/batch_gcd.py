@@ -0,0 +1,79 @@
+import os
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from tempfile import TemporaryDirectory
+
+from src.base import gcd, product_tree, remainder_tree
+
+
+def batch_gcd(moduli: list[int]) -> list[int]:
+    '''Calcula, para cada n_i em `moduli`, gcd(n_i, prod(n_j, j != i)), usando a
+    árvore de produtos dos módulos e a árvore de restos de P = prod(n_i) módulo
+    n_i². Um resultado diferente de 1 indica que n_i compartilha um fator primo com
+    outro módulo da lista. Complexidade: quase linear no tamanho total da entrada,
+    contra O(k²) MDCs ao comparar os k módulos dois a dois.
+    Exemplo: batch_gcd([15, 21, 77]) => [3, 21, 7]'''
+    if not moduli: return []
+    tree = product_tree(moduli)
+    squares = [[x * x for x in level] for level in tree]
+    rems = remainder_tree(tree[-1][0], squares)
+    return [gcd(r // n, n) for r, n in zip(rems, moduli)]
+
+def read_moduli(path: str) -> Iterator[int]:
+    '''Lê um módulo por linha, em decimal ou com prefixo (0x, 0o, 0b). Linhas em
+    branco e comentários iniciados por # são ignorados.'''
+    with open(path) as file:
+        for line in file:
+            line = line.split('#', 1)[0].strip()
+            if line: yield int(line, 0)
+
+def _write_level(path: str, numbers: Iterable[int]) -> int:
+    count = 0
+    with open(path, 'w') as file:
+        for x in numbers:
+            file.write(f'{x:x}\n')
+            count += 1
+    return count
+
+def _read_level(path: str) -> Iterator[int]:
+    with open(path) as file:
+        for line in file:
+            yield int(line, 16)
+
+def _pairs(numbers: Iterator[int]) -> Iterator[int]:
+    for x in numbers:
+        yield x * next(numbers, 1)
+
+def _descend(parents: Iterator[int], level: Iterator[int]) -> Iterator[int]:
+    # Cada resto do nível de cima reduz os (até) dois filhos do nível de baixo.
+    for r in parents:
+        for x in islice(level, 2):
+            yield r % (x * x)
+
+def batch_gcd_file(path: str, workdir: str=None) -> Iterator[tuple[int, int, int]]:
+    '''Versão de `batch_gcd()` para coleções grandes: os módulos são lidos de um
+    arquivo (veja `read_moduli()`), e cada nível das árvores de produtos e de restos
+    é gravado em disco e lido de volta em fluxo, de modo que só alguns números de
+    cada nível ficam em memória ao mesmo tempo. Retorna, sob demanda, as triplas
+    (índice, n_i, d_i) dos módulos com d_i = gcd(n_i, prod(n_j, j != i)) != 1.'''
+    with TemporaryDirectory(dir=workdir) as tmp:
+        level = os.path.join(tmp, 'product0')
+        sizes = [_write_level(level, read_moduli(path))]
+        if sizes[0] == 0: return
+        while sizes[-1] > 1:
+            parent = os.path.join(tmp, f'product{len(sizes)}')
+            sizes.append(_write_level(parent, _pairs(_read_level(level))))
+            level = parent
+        rems = os.path.join(tmp, f'remainder{len(sizes) - 1}')
+        _write_level(rems, _read_level(level))
+        for depth in range(len(sizes) - 2, -1, -1):
+            level = os.path.join(tmp, f'product{depth}')
+            child = os.path.join(tmp, f'remainder{depth}')
+            _write_level(child, _descend(_read_level(rems), _read_level(level)))
+            os.remove(rems)
+            if depth > 0: os.remove(level)
+            rems = child
+        moduli = _read_level(os.path.join(tmp, 'product0'))
+        for i, (n, r) in enumerate(zip(moduli, _read_level(rems))):
+            d = gcd(r // n, n)
+            if d != 1: yield i, n, d
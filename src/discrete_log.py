@@ -1,65 +1,414 @@
-from time import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor, Executor, FIRST_COMPLETED, wait
+from os import cpu_count
+from multiprocessing.managers import BaseProxy
+from random import randint, Random
 
-from src.base import isqrt
-from src.modular_arithmetic import powmod, congruence_system
-from src.util import error, Powers
+from src.base import isqrt, gcd, ilog2
+from src.index_calculus import index_calculus_log
+from src.modular_arithmetic import powmod, multi_powmod, invmod, congruence_system
+from src.primality import prime_miller_rabin
+from src.util import Deadline, Powers
 
 
-def baby_step_giant_step(g:int, h:int, n:int, order:int, timeout:int=15) -> int:
+# Número máximo de baby-steps que o Pohlig-Hellman aceita guardar em memória;
+# acima disso, o log em cada subgrupo é calculado com o rho de Pollard.
+BSGS_MEMORY_LIMIT = 2**18
+
+# Número total de posições (somando todas as tabelas) que o cache de tabelas de
+# baby-steps mantém; cada posição ocupa 12 bytes.
+BSGS_CACHE_SLOTS = 2**22
+
+# Para n primo, fatores primos simples de n - 1 acima desse valor são resolvidos
+# pelo cálculo do índice em vez dos métodos genéricos O(sqrt(q)).
+INDEX_CALCULUS_THRESHOLD = 2**40
+
+_executors: dict[int, ProcessPoolExecutor] = {}
+
+
+class BabyStepTable:
+    '''Tabela de baby-steps g^j mod n, 0 <= j < m, m = isqrt(order) + 1, usada pelo
+    baby-step, giant-step. Os passos são gerados com uma multiplicação cada, e a
+    tabela é de endereçamento aberto sobre dois `array`: um guarda 32 bits do
+    valor (hash truncado) e o outro guarda j + 1 (0 marca posição vazia). Como o
+    hash é truncado, cada coincidência é confirmada com `powmod()`.
+    A tabela não depende de h, então pode ser reusada para vários logaritmos com
+    os mesmos (g, n).'''
+    def __init__(self, g: int, n: int, order: int, timeout: int=15, deadline: Deadline=None):
+        self.g, self.n, self.order = g, n, order
+        self.m = isqrt(order) + 1
+        size = 1 << (2 * self.m).bit_length()
+        self.mask = size - 1
+        self.keys = array('I', [0]) * size
+        self.steps = array('L', [0]) * size
+        deadline = deadline or Deadline(timeout)
+        b = 1
+        for j in range(self.m):
+            if j % deadline.every == 0: deadline.tick('baby_steps', j)
+            if j > 0 and b == 1: break
+            slot = hash(b) & self.mask
+            while self.steps[slot]:
+                slot = (slot + 1) & self.mask
+            self.keys[slot] = (b >> 16) & 0xFFFFFFFF
+            self.steps[slot] = j + 1
+            b = b * g % n
+        self.giant = powmod(g, -self.m, n)
+
+    def lookup(self, y: int) -> int | None:
+        '''Retorna j tal que g^j = y mod n, se y estiver na tabela, ou None.'''
+        key = (y >> 16) & 0xFFFFFFFF
+        slot = hash(y) & self.mask
+        while self.steps[slot]:
+            if self.keys[slot] == key:
+                j = self.steps[slot] - 1
+                if powmod(self.g, j, self.n) == y: return j
+            slot = (slot + 1) & self.mask
+        return None
+
+    def log(self, h: int, timeout: int=15, deadline: Deadline=None) -> int:
+        '''Calcula x tal que g^x = h mod n, avançando os giant-steps h * g^(-m*i)
+        com uma multiplicação cada.'''
+        deadline = deadline or Deadline(timeout)
+        y = h % self.n
+        for i in range(self.m):
+            if i % deadline.every == 0: deadline.tick('giant_steps', i, {'giant_steps': i})
+            j = self.lookup(y)
+            if j is not None:
+                return i * self.m + j
+            y = y * self.giant % self.n
+        raise ValueError("Baby-step, giant-step failed: g does not generate n.")
+
+_tables: dict[tuple[int, int, int], BabyStepTable] = {}
+
+def baby_step_table(g: int, n: int, order: int, deadline: Deadline=None) -> BabyStepTable:
+    '''Retorna a tabela de baby-steps para (g, n, order), reaproveitando tabelas
+    já construídas. As tabelas menos usadas recentemente são descartadas quando o
+    total de posições passa de BSGS_CACHE_SLOTS; a tabela recém-criada sempre fica.'''
+    key = (g, n, order)
+    if key in _tables:
+        _tables[key] = _tables.pop(key)
+        return _tables[key]
+    table = BabyStepTable(g, n, order, deadline=deadline)
+    _tables[key] = table
+    while len(_tables) > 1 and sum(len(t.keys) for t in _tables.values()) > BSGS_CACHE_SLOTS:
+        _tables.pop(next(iter(_tables)))
+    return table
+
+def baby_step_giant_step(g:int, h:int, n:int, order:int, timeout:int=15, deadline:Deadline=None) -> int:
     '''Implementação do algoritmo baby-step, giant-step para calcular o logaritmo
     discreto x tal que g^x = h mod n. Se a ordem de g for conhecida, pode ser passada
     como argumento opcional para acelerar o algoritmo.
-    Se h ∉ <g>, uma exceção é gerada.
-    Complexidade: O(sqrt(n)).
+    Se h ∉ <g>, uma exceção é gerada. A tabela de baby-steps fica em cache para
+    chamadas seguintes com os mesmos (g, n, order).
+    Complexidade: O(sqrt(order)) multiplicações.
     Exemplos:
     baby_step_giant_step(7, 2, 41, 40) => 14
     baby_step_giant_step(2, 7, 9, 6) => 4'''
-    m = isqrt(order) + 1
-    powers = {}
-    start = time()
-    for i in range(m):
-        if time() - start > timeout: error("Tempo excedido: não foi possível calcular o log discreto.")
-        b = powmod(g, i, n)
-        powers[b] = i
-    c = powmod(g, m * (n - 2), n)
-    for i in range(m):
-        if time() - start > timeout: error("Tempo excedido: não foi possível calcular o log discreto.")
-        y = (h * powmod(c, i, n)) % n
-        if y in powers:
-            j = powers[y]
-            return i * m + j
-    raise ValueError("Baby-step, giant-step failed: g does not generate n.")
-
-def pohlig_hellman_prime_power_order(g:int, h:int, p:int, e:int, n:int) -> int:
+    deadline = deadline or Deadline(timeout)
+    return baby_step_table(g, n, order, deadline).log(h, deadline=deadline)
+
+def discrete_logs(g:int, H:list[int], n:int, order:int, timeout:int=15, deadline:Deadline=None) -> list[int]:
+    '''Calcula os logaritmos discretos de todos os elementos de H na base g mod n,
+    compartilhando uma única tabela de baby-steps.
+    Complexidade: O(sqrt(order) * (1 + len(H))) multiplicações.'''
+    deadline = deadline or Deadline(timeout)
+    table = baby_step_table(g, n, order, deadline)
+    return [table.log(h, deadline=deadline) for h in H]
+
+def _solve_collision(g:int, h:int, n:int, order:int, da:int, db:int, deadline:Deadline) -> int | None:
+    '''Resolve x * db = da mod order, retornando a solução x tal que g^x = h mod n,
+    ou None se a colisão não levar a uma solução. Com d = gcd(db, order), as
+    candidatas são x0 + k * (order / d), 0 <= k < d: até 2^16 delas são testadas
+    uma a uma; acima disso, k é o log de h * g^-x0 na base g^(order / d), de ordem
+    d, calculado recursivamente em O(sqrt(d)).'''
+    da, db = da % order, db % order
+    if db == 0: return None
+    d = gcd(db, order)
+    if da % d != 0: return None
+    m = order // d
+    x = (da // d) * invmod(db // d, m) % m if m > 1 else 0
+    if d > 2**16:
+        try:
+            k = pollard_rho_log(powmod(g, m, n), h * powmod(g, -x, n), n, d, deadline=deadline)
+        except ValueError:
+            return None
+        return x + k * m
+    for k in range(d):
+        if powmod(g, x + k * m, n) == h % n: return x + k * m
+    return None
+
+def pollard_rho_log(g:int, h:int, n:int, order:int, timeout:int=15, restarts:int=32,
+                    deadline:Deadline=None) -> int:
+    '''Calcula o logaritmo discreto x tal que g^x = h mod n com o rho de Pollard,
+    usando a caminhada x -> x*g, x², x*h (partição por x mod 3) sobre elementos
+    g^a * h^b e o método de Brent para detectar o ciclo. Usa memória O(1).
+    A ordem de g deve ser conhecida; o caso ideal é uma ordem prima. Se
+    h^order != 1, h ∉ <g> e uma exceção ValueError é gerada; o mesmo acontece se
+    nenhuma das `restarts` caminhadas levar a uma solução.
+    Complexidade: O(sqrt(order)) multiplicações, em média.
+    Exemplo: pollard_rho_log(4, 64, 1000000007, 500000003) => 3'''
+    h %= n
+    if h == 1: return 0
+    if powmod(h, order, n) != 1: raise ValueError("Pollard rho failed: h is not in the subgroup generated by g.")
+    deadline = deadline or Deadline(timeout)
+    steps = 0
+    for _ in range(restarts):
+        a, b = randint(0, order - 1), randint(0, order - 1)
+        x = multi_powmod([(g, a), (h, b)], n)
+        power, lam = 1, 1
+        xt, at, bt = x, a, b
+        while True:
+            steps += 1
+            if steps % deadline.every == 0: deadline.tick('rho', steps)
+            if power == lam:
+                xt, at, bt = x, a, b
+                power *= 2
+                lam = 0
+            r = x % 3
+            if r == 0:
+                x, a = x * g % n, (a + 1) % order
+            elif r == 1:
+                x, a, b = x * x % n, 2 * a % order, 2 * b % order
+            else:
+                x, b = x * h % n, (b + 1) % order
+            lam += 1
+            if x == xt: break
+        solution = _solve_collision(g, h, n, order, a - at, bt - b, deadline)
+        if solution is not None: return solution
+    raise ValueError(f"Pollard rho failed: no solution after {restarts} walks.")
+
+def pollard_kangaroo(g:int, h:int, n:int, a:int, b:int, timeout:int=15, retries:int=32,
+                     deadline:Deadline=None) -> int:
+    '''Calcula o logaritmo discreto x tal que g^x = h mod n, sabendo que
+    a <= x <= b, com o método do canguru (lambda) de Pollard. O canguru domesticado
+    parte de g^b e deixa uma armadilha; o selvagem parte de h e a encontra se
+    os caminhos se cruzarem. Os saltos são potências de 2 com média ~ sqrt(b - a)/2.
+    Usa memória O(1). Complexidade: O(sqrt(b - a)) multiplicações.
+    Exemplo: pollard_kangaroo(7, 2, 41, 0, 39) => 14'''
+    if b < a: raise ValueError("Called pollard_kangaroo() with an empty interval.")
+    h %= n
+    w = b - a
+    mean = max(1, isqrt(w) // 2)
+    k = 1
+    while ((1 << k) - 1) // k < mean:
+        k += 1
+    jumps = [1 << i for i in range(k)]
+    factors = [powmod(g, s, n) for s in jumps]
+    deadline = deadline or Deadline(timeout)
+    x, D = powmod(g, b, n), 0
+    for _ in range(4 * mean):
+        i = x % k
+        x, D = x * factors[i] % n, D + jumps[i]
+    trap = x
+    steps = 0
+    for r in range(retries):
+        y, d = h * powmod(g, r, n) % n, 0
+        while d <= w + D:
+            if y == trap:
+                log = b + D - d - r
+                if a <= log <= b and powmod(g, log, n) == h: return log
+                break
+            i = y % k
+            y, d = y * factors[i] % n, d + jumps[i]
+            steps += 1
+            if steps % deadline.every == 0: deadline.tick('kangaroo', steps)
+    raise ValueError("Pollard's kangaroo failed: log not found in the given interval.")
+
+def _walk_table(g:int, h:int, n:int, order:int, seed:int, r:int=16) -> tuple[list[int], list[int], list[int]]:
+    '''Multiplicadores M_j = g^u_j * h^v_j da caminhada r-adding. A semente é a
+    mesma para todos os caminhantes, que então seguem a mesma função de passo.'''
+    rng = Random(seed)
+    U = [rng.randrange(order) for _ in range(r)]
+    V = [rng.randrange(order) for _ in range(r)]
+    M = [multi_powmod([(g, u), (h, v)], n) for u, v in zip(U, V)]
+    return M, U, V
+
+def distinguished_points(g:int, h:int, n:int, order:int, table_seed:int, seed:int,
+                         bits:int, count:int) -> list[tuple[int, int, int]]:
+    '''Caminhante do rho paralelo: parte de pontos aleatórios g^a * h^b, segue a
+    caminhada r-adding definida por `table_seed` até encontrar um ponto
+    distinto (os `bits` bits mais baixos nulos) e o reporta como (x, a, b).
+    Trilhas longas demais, possivelmente presas em um ciclo, são abandonadas.
+    Retorna `count` pontos distintos.'''
+    M, U, V = _walk_table(g, h, n, order, table_seed)
+    r, mask, limit = len(M), (1 << bits) - 1, 20 << bits
+    rng = Random(seed)
+    points = []
+    while len(points) < count:
+        a, b = rng.randrange(order), rng.randrange(order)
+        x = multi_powmod([(g, a), (h, b)], n)
+        for _ in range(limit):
+            if x & mask == 0:
+                points.append((x, a, b))
+                break
+            j = x % r
+            x, a, b = x * M[j] % n, (a + U[j]) % order, (b + V[j]) % order
+    return points
+
+def parallel_pollard_rho_log(g:int, h:int, n:int, order:int, workers:int=None,
+                             executor:Executor=None, timeout:int=15, deadline:Deadline=None) -> int:
+    '''Versão paralela do rho de Pollard com pontos distintos (van Oorschot-Wiener).
+    Vários caminhantes rodam em processos separados e reportam os pontos distintos
+    encontrados; o processo principal os coleta, e uma colisão entre dois pontos
+    com coeficientes (a, b) diferentes resolve o logaritmo. O tempo total cai
+    aproximadamente linearmente com o número de processos.
+    Se `executor` não for passado, um pool com `workers` processos é criado. O prazo
+    e o cancelamento são verificados no processo principal, entre lotes de pontos.
+    Complexidade: O(sqrt(order) / workers) multiplicações por processo.'''
+    h %= n
+    if h == 1: return 0
+    if powmod(h, order, n) != 1: raise ValueError("Pollard rho failed: h is not in the subgroup generated by g.")
+    workers = workers or cpu_count() or 1
+    deadline = deadline or Deadline(timeout)
+    if executor is None:
+        with ProcessPoolExecutor(workers) as pool:
+            return parallel_pollard_rho_log(g, h, n, order, workers, pool, deadline=deadline)
+    bits = max(0, ilog2(isqrt(order) + 1) - 8)
+    count = 16
+    table_seed = randint(0, 2**32)
+    seen = {}
+    pending = set()
+    seed = randint(0, 2**32)
+    for i in range(workers):
+        pending.add(executor.submit(distinguished_points, g, h, n, order, table_seed, seed + i, bits, count))
+    seed += workers
+    try:
+        while True:
+            remaining = deadline.remaining()
+            done, pending = wait(pending, timeout=0.5 if remaining is None else min(0.5, remaining),
+                                 return_when=FIRST_COMPLETED)
+            deadline.tick('distinguished_points', len(seen))
+            for future in done:
+                for x, a, b in future.result():
+                    if x in seen and seen[x] != (a, b):
+                        a2, b2 = seen[x]
+                        solution = _solve_collision(g, h, n, order, a - a2, b2 - b, deadline)
+                        if solution is not None: return solution
+                    seen[x] = (a, b)
+                pending.add(executor.submit(distinguished_points, g, h, n, order, table_seed, seed, bits, count))
+                seed += 1
+    finally:
+        for future in pending:
+            future.cancel()
+
+def pohlig_hellman_prime_power_order(g:int, h:int, p:int, e:int, n:int, memory_limit:int=BSGS_MEMORY_LIMIT,
+                                     executor:Executor=None, deadline:Deadline=None) -> int:
     """Computa o logaritmo discreto x tal que g^x = h mod n, onde g gera um
     subgrupo de Zn de ordem p**e. Complexidade de tempo: O(e * sqrt(p)).
     Por exemplo, 27 gera um subgrupo de Z_{41} com ordem 8 = 2³. Esse subgrupo é
     dado pelos elementos [27, 32, 3, 40, 14, 9, 38, 1]. Assim, escolhendo o 
     elemento h = 14, temos que 27**5 = 14 mod 41. Logo, x = 5, ou seja,
     pohlig_hellman_prime_power_order(27, 14, 2, 3, 41) => 5.
+    Os logs no subgrupo de ordem p usam baby-step, giant-step enquanto a tabela
+    couber em `memory_limit` entradas, e o rho de Pollard (memória O(1)) acima disso.
+    Se um `executor` for passado, o rho roda em paralelo nos seus processos.
     Complexidade: O(e * sqrt(p)).
     """
+    use_rho = isqrt(p) + 1 > memory_limit
     x = 0
     for k in range(e):
-        a_k = powmod(g, -x, n) * h % n
+        a_k = multi_powmod([(g, -x), (h, 1)], n)
         e_k = n // p**(1 + k)
         h_k = powmod(a_k, e_k, n)
         g_k = powmod(g, n // p, n)
-        d_k = baby_step_giant_step(g_k, h_k, n, p)
+        if use_rho and executor is not None:
+            d_k = parallel_pollard_rho_log(g_k, h_k, n, p, executor=executor, deadline=deadline)
+        elif use_rho:
+            d_k = pollard_rho_log(g_k, h_k, n, p, deadline=deadline)
+        else:
+            d_k = baby_step_giant_step(g_k, h_k, n, p, deadline=deadline)
         x += d_k * p**k
     return x
 
-def pohlig_hellman(g: int, h:int, n:int, f:Powers) -> int:
+def shared_executor(workers: int) -> ProcessPoolExecutor:
+    '''Retorna o pool de processos com `workers` processos compartilhado pelas
+    chamadas de `pohlig_hellman()`, criando-o na primeira vez. Manter o pool vivo
+    preserva os caches de cada processo entre chamadas para o mesmo primo.'''
+    pool = _executors.get(workers)
+    # Um pool quebrado (processo de trabalho morto, por exemplo ao receber o Event
+    # de um Manager já encerrado) não aceita mais jobs e é substituído.
+    if pool is None or pool._broken:		# pylint: disable=protected-access
+        pool = _executors[workers] = ProcessPoolExecutor(workers)
+    return pool
+
+def _shared_deadline(deadline: Deadline | None) -> tuple[float | None, object]:
+    '''Extrai de `deadline` o que pode ser enviado a outro processo: o tempo
+    restante e o Event, se ele for compartilhável entre processos (um Event criado
+    por um `multiprocessing.Manager`, como o do `src.aio.Engine`).'''
+    if deadline is None: return None, None
+    event = deadline.event if isinstance(deadline.event, BaseProxy) else None
+    return deadline.remaining(), event
+
+def _call_with_deadline(f, args: tuple, use_deadline: bool, timeout: float | None, event):
+    '''Executada no pool: recria, no processo de trabalho, o prazo e o Event de
+    cancelamento do processo principal.'''
+    if not use_deadline: return f(*args)
+    return f(*args, deadline=Deadline(timeout, event=event))
+
+def _result(future, deadline: Deadline | None):
+    '''Aguarda o resultado de `future`, verificando `deadline` enquanto espera.'''
+    while deadline is not None:
+        remaining = deadline.remaining()
+        done, _ = wait([future], timeout=0.1 if remaining is None else min(0.1, remaining))
+        if done: break
+        deadline.check()
+    return future.result()
+
+def pohlig_hellman(g: int, h:int, n:int, f:Powers, memory_limit:int=BSGS_MEMORY_LIMIT, workers:int=1,
+                   index_calculus_limit:int=INDEX_CALCULUS_THRESHOLD, deadline:Deadline=None,
+                   executor:Executor=None) -> int:
     '''Resolve o problema do logaritmo discreto g^x = h mod n, usando o 
     método de Pohlig-Hellman. Dada a decomposição em primos p1^e1..pr^er,
     a complexidade desse algoritmo é O(r * sqrt(p)), onde p é o maior fator 
-    primo de n - 1. Retorna x.'''
-    r, m = [], []
+    primo de n - 1. Retorna x.
+    Com workers > 1, os subproblemas de cada p^e, que são independentes, rodam em
+    um pool de processos, que é o `executor` passado ou um pool compartilhado por
+    todas as chamadas com o mesmo número de processos (ver `shared_executor()`),
+    de modo que os caches dos processos de trabalho (tabelas de baby-steps e
+    contextos do cálculo do índice) sobrevivem entre chamadas; os subgrupos grandes demais para o baby-step, giant-step
+    usam o rho paralelo sobre o mesmo pool. Os processos recebem o tempo restante
+    de `deadline` (e o seu Event, se for compartilhável), e o processo principal
+    verifica o prazo enquanto espera; ao estourar o prazo, os jobs ainda na fila
+    são cancelados, e os que já rodam terminam pelo próprio prazo.
+    Se n for primo, os fatores p > `index_calculus_limit` com expoente 1 são
+    resolvidos pelo cálculo do índice, cujos logs da base de fatores ficam em cache
+    para chamadas seguintes com os mesmos (g, n).'''
+    components = []
+    n_is_prime = prime_miller_rabin(n)
     for p, e in f.items():
         e_i = n // p**e
-        g_i = powmod(g, e_i, n)
-        h_i = powmod(h, e_i, n)
-        r_i = pohlig_hellman_prime_power_order(g_i, h_i, p, e, n)
-        r.append(r_i)
-        m.append(p**e)
+        g_i, h_i = powmod(g, e_i, n), powmod(h, e_i, n)
+        index_calculus = n_is_prime and e == 1 and p > index_calculus_limit and g_i != 1
+        components.append((g_i, h_i, p, e, index_calculus))
+    if workers > 1 or executor is not None:
+        pool = executor or shared_executor(workers)
+        futures = {}
+        try:
+            if deadline is not None: deadline.check()
+            timeout, event = _shared_deadline(deadline)
+            for g_i, h_i, p, e, index_calculus in components:
+                if index_calculus:
+                    futures[p] = pool.submit(_call_with_deadline, index_calculus_log, (g, h, n, p),
+                                             deadline is not None, timeout, event)
+                elif isqrt(p) + 1 <= memory_limit:
+                    futures[p] = pool.submit(_call_with_deadline, pohlig_hellman_prime_power_order,
+                                             (g_i, h_i, p, e, n, memory_limit), deadline is not None, timeout, event)
+            r = []
+            for g_i, h_i, p, e, _ in components:
+                if p in futures:
+                    r.append(_result(futures[p], deadline))
+                else:
+                    r.append(pohlig_hellman_prime_power_order(g_i, h_i, p, e, n, memory_limit, pool, deadline))
+                if deadline is not None: deadline.tick('pohlig_hellman', len(r))
+        finally:
+            for future in futures.values():
+                future.cancel()
+    else:
+        r = []
+        for g_i, h_i, p, e, index_calculus in components:
+            if index_calculus:
+                r.append(index_calculus_log(g, h, n, p, deadline))
+            else:
+                r.append(pohlig_hellman_prime_power_order(g_i, h_i, p, e, n, memory_limit, deadline=deadline))
+    m = [p**e for _, _, p, e, _ in components]
     return congruence_system(r, m) % n
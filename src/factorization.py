@@ -1,10 +1,26 @@
 from collections import Counter
 from random import randint
-from time import time
 
-from src.base import poly, gcd
-from src.primality import prime_miller_rabin
-from src.util import error, Powers
+from src.base import poly, gcd, isqrt, iroot, perfect_power
+from src.primality import prime_miller_rabin, eratosthenes_sieve
+from src.util import Deadline, Powers
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Números abaixo deste limite são fatorados por `factor_small()` em vez do
+# Pollard's rho ou do crivo quadrático.
+SMALL_LIMIT = 2**64
+SMALL_PRIMES = eratosthenes_sieve(1000)[1:]
+HART_ROUNDS = 2**12
+# Na versão vetorizada, n * i e s² precisam caber em int64 e ser exatos em float64.
+VECTOR_LIMIT = 2**40
+VECTOR_MULTIPLIERS = 6
+SQUARES_MOD_64 = frozenset(i * i % 64 for i in range(64))
+SQUFOF_MULTIPLIERS = (1, 3, 5, 7, 11, 3*5, 3*7, 3*11, 5*7, 5*11, 7*11, 3*5*7, 3*5*11, 3*7*11, 5*7*11, 3*5*7*11)
 
 
 def totient(x:int, f:Powers) -> int:
@@ -43,7 +59,7 @@ def factor_with_limited_primes(n: int, primes: list[int]) -> Powers:
         powers[p] = alpha
     return powers, u
 
-def pollard_rho_factor(n: int, timeout:int=15) -> int:
+def pollard_rho_factor(n: int, timeout:int=15, deadline:Deadline=None) -> int:
     '''Usa o algoritmo Pollard's rho para encontrar um fator de n.
     Retorna o valor encontrado.
     Exemplo: pollard_rho_factor(40) => 8
@@ -52,11 +68,14 @@ def pollard_rho_factor(n: int, timeout:int=15) -> int:
     if prime_miller_rabin(n): raise ValueError(f"Called pollard_rho_factor() on n={n}, but it looks like n is prime.")
     x = 2
     c = [1, 0, 1]			# pseudo-random poly coefficients i.e. 1x²+0x+1
-    start = time()
-    while time() - start < timeout:
+    deadline = deadline or Deadline(timeout)
+    steps = 0
+    while True:
         p = poly(*c)		# pseudo-random polynom
         T, H = x, x			# tortoise and the hare
         for _ in range(n):
+            steps += 1
+            if steps % deadline.every == 0: deadline.tick('rho', steps)
             T = p(T) % n
             H = p(p(H)) % n
             d = gcd(T - H, n)
@@ -66,7 +85,6 @@ def pollard_rho_factor(n: int, timeout:int=15) -> int:
                 x = randint(0, n - 1)		 				# arbitrary starting value for x
                 c = [randint(0, n - 1) for _ in range(3)]	# arbitrary coefficients
                 break
-    error(f"Tempo excedido: não foi possível encontrar um fator de n - 1. Tempo máximo: {timeout}")
 
 def pollard_rho_prime_power_decomposition(n: int, primes:list[int]=None, count=1) -> Counter[int, int]:
     '''
@@ -75,17 +93,225 @@ def pollard_rho_prime_power_decomposition(n: int, primes:list[int]=None, count=1
     Complexidade: O(r * sqrt(p)), onde r é o número de fatores primos de n, e p
     é o maior fator primo de n.
     Exemplo: pollard_rho_prime_power_decomposition(40) => {2: 3, 5: 1}
+    Potências perfeitas n = r^k são reduzidas à decomposição de r antes de
+    recorrer ao Pollard's rho, e pedaços menores que 2^64 são quebrados por
+    `factor_small()`.
     '''
     if n == 1: return Counter()
     primes = primes or []
     if prime_miller_rabin(n): return Counter({n: count})
+    r, k = perfect_power(n)
+    if k > 1: return pollard_rho_prime_power_decomposition(r, primes, count * k)
     for p in primes:
         if n % p == 0:
             x = p
             break
     else:
-        x = pollard_rho_factor(n)
+        x = factor_small(n) if n < SMALL_LIMIT else pollard_rho_factor(n)
     y, i = factor_out(n, x)
     x_factors = pollard_rho_prime_power_decomposition(x, primes, count + i - 1)
     y_factors = pollard_rho_prime_power_decomposition(y, primes, count)
     return x_factors + y_factors
+
+def hart_one_line(n: int, rounds: int=HART_ROUNDS) -> int | None:
+    '''Algoritmo de uma linha de Hart: para i = 1, 2, ..., toma s = ceil(sqrt(n*i))
+    e testa se m = s² mod n é um quadrado perfeito t²; nesse caso, s² ≡ t² mod n e
+    gcd(s - t, n) costuma ser um fator de n. Retorna None se nenhum fator for
+    encontrado em `rounds` iterações. Muito rápido para n de até uns 42 bits.
+    Exemplo: hart_one_line(2041) => 13'''
+    for i in range(1, rounds + 1):
+        ni = n * i
+        s = isqrt(ni)
+        if s * s != ni: s += 1
+        m = s * s % n
+        t = isqrt(m)
+        if t * t == m:
+            d = gcd(s - t, n)
+            if 1 < d < n: return d
+    return None
+
+def lehman(n: int) -> int | None:
+    '''Método de Lehman: divisão por tentativa até n^(1/3) e, em seguida, busca
+    de a² - 4kn = b² para k <= n^(1/3), com a em um intervalo de largura
+    ~n^(1/6) / sqrt(k). Determinístico: para n composto, sempre encontra um fator.
+    Complexidade: O(n^(1/3)). Retorna None se n for primo.
+    Exemplo: lehman(2041) => 157'''
+    c = iroot(n, 3)
+    for p in range(2, c + 2):
+        if n % p == 0: return p
+    for k in range(1, c + 1):
+        fourkn = 4 * k * n
+        a = isqrt(fourkn)
+        if a * a != fourkn: a += 1
+        a_max = isqrt(fourkn + (c + 1)**2)
+        for a in range(a, a_max + 1):
+            b2 = a * a - fourkn
+            b = isqrt(b2)
+            if b * b == b2:
+                d = gcd(a + b, n)
+                if 1 < d < n: return d
+    return None
+
+def squfof(n: int) -> int | None:
+    '''Fatoração por formas quadradas de Shanks (SQUFOF). Percorre a fração
+    contínua de sqrt(k*n), para cada multiplicador k, até encontrar uma forma
+    quadrada, e então a forma reduzida ambígua que revela um fator. Todos os
+    valores intermediários são da ordem de sqrt(k*n), o que torna o método
+    adequado a n < 2^64. Complexidade: O(n^(1/4)). Retorna None em caso de falha.
+    Exemplo: squfof(11111) => 41'''
+    s = isqrt(n)
+    if s * s == n: return s
+    limit = 3 * 2 * isqrt(2 * s)
+    for k in SQUFOF_MULTIPLIERS:
+        D = k * n
+        P0 = P = Pprev = isqrt(D)
+        Qprev, Q = 1, D - P0 * P0
+        if Q == 0:
+            d = gcd(P0, n)
+            if 1 < d < n: return d
+            continue
+        for i in range(2, limit):
+            b = (P0 + P) // Q
+            P = b * Q - P
+            q = Q
+            Q = Qprev + b * (Pprev - P)
+            if i % 2 == 0 and Q & 63 in SQUARES_MOD_64:
+                r = isqrt(Q)
+                if r * r == Q: break
+            Qprev, Pprev = q, P
+        else:
+            continue
+        b = (P0 - P) // r
+        Pprev = P = b * r + P
+        Qprev = r
+        Q = (D - Pprev * Pprev) // Qprev
+        for _ in range(limit):
+            b = (P0 + P) // Q
+            Pprev = P
+            P = b * Q - P
+            Qprev, Q = Q, Qprev + b * (Pprev - P)
+            if P == Pprev: break
+        d = gcd(n, Qprev)
+        if 1 < d < n: return d
+    return None
+
+def factor_small(n: int) -> int:
+    '''Retorna um fator não trivial do número composto n < 2^64 (SMALL_LIMIT).
+    Tenta, nesta ordem, divisão pelos primos até 1000, o SQUFOF, o algoritmo de
+    uma linha de Hart e, por fim, o método de Lehman, que sempre encontra um fator.
+    Exemplo: factor_small(10201030027) => 2251'''
+    if not 1 < n < SMALL_LIMIT: raise ValueError(f"Called factor_small() on n={n}, outside of [2, 2^64).")
+    if prime_miller_rabin(n): raise ValueError(f"Called factor_small() on n={n}, but it looks like n is prime.")
+    for p in SMALL_PRIMES:
+        if n % p == 0: return p
+    return squfof(n) or hart_one_line(n) or lehman(n)
+
+def _isqrt_vector(x):
+    '''Raiz quadrada inteira de um vetor int64 de valores menores que 2^52, pela
+    raiz em float64 corrigida em uma unidade.'''
+    r = np.sqrt(x.astype(np.float64)).astype(np.int64)
+    r -= r * r > x
+    r += (r + 1) * (r + 1) <= x
+    return r
+
+def _hart_vector(N, rounds: int):
+    '''Versão vetorizada de `hart_one_line()`. Retorna um vetor com um fator para
+    cada elemento de N, ou 0 onde nenhum fator foi encontrado.'''
+    factors = np.zeros_like(N)
+    for i in range(1, rounds + 1):
+        ni = N * i
+        s = _isqrt_vector(ni)
+        s += s * s != ni
+        m = s * s % N
+        t = _isqrt_vector(m)
+        d = np.gcd(s - t, N)
+        found = (factors == 0) & (t * t == m) & (d > 1) & (d < N)
+        factors[found] = d[found]
+    return factors
+
+def _squfof_vector(N, k: int):
+    '''Versão vetorizada de `squfof()`, com um único multiplicador k, para um vetor
+    de números ímpares, compostos e tais que k*n não é quadrado. Cada elemento
+    percorre sua própria fração contínua, e os que terminam uma fase saem dos
+    vetores, de modo que o custo de cada iteração acompanha o número de elementos
+    ainda ativos. Retorna um vetor com um fator para cada elemento, ou 0 em caso
+    de falha.'''
+    factors = np.zeros_like(N)
+    limit = 3 * 2 * isqrt(2 * isqrt(int(N.max())))
+    # Fase 1: avança até uma forma quadrada Q = r² em posição par.
+    index = np.arange(N.size)
+    D = k * N
+    P0 = _isqrt_vector(D)
+    P, Pprev = P0.copy(), P0.copy()
+    Qprev, Q = np.ones_like(N), D - P0 * P0
+    found_index, found_P, found_r = [], [], []
+    for i in range(2, limit):
+        if index.size == 0: break
+        b = (P0 + P) // Q
+        P = b * Q - P
+        Q, Qprev = Qprev + b * (Pprev - P), Q
+        Pprev = P
+        if i % 2 == 0:
+            r = _isqrt_vector(Q)
+            square = r * r == Q
+            if square.any():
+                found_index.append(index[square])
+                found_P.append(P[square])
+                found_r.append(r[square])
+                keep = ~square
+                index, D, P0, P, Pprev, Q, Qprev = (x[keep] for x in (index, D, P0, P, Pprev, Q, Qprev))
+    if not found_index: return factors
+    # Fase 2: parte da raiz quadrada da forma e avança até P se repetir.
+    index = np.concatenate(found_index)
+    P, r = np.concatenate(found_P), np.concatenate(found_r)
+    n, D = N[index], k * N[index]
+    P0 = _isqrt_vector(D)
+    P = (P0 - P) // r * r + P
+    Qprev, Q = r, (D - P * P) // r
+    for _ in range(limit):
+        if index.size == 0: break
+        b = (P0 + P) // Q
+        Pprev, P = P, b * Q - P
+        Qprev, Q = Q, Qprev + b * (Pprev - P)
+        done = P == Pprev
+        if done.any():
+            d = np.gcd(n[done], Qprev[done])
+            factors[index[done]] = np.where((d > 1) & (d < n[done]), d, 0)
+            keep = ~done
+            index, n, D, P0, P, Q, Qprev = (x[keep] for x in (index, n, D, P0, P, Q, Qprev))
+    return factors
+
+def factor_small_batch(numbers: list[int], rounds: int=32) -> list[int | None]:
+    '''Versão em lote de `factor_small()`: retorna, para cada n em `numbers`, um
+    fator não trivial, ou None se n for primo ou menor que 4. Se o NumPy estiver
+    instalado, os números abaixo de 2^40 (VECTOR_LIMIT) passam primeiro pela
+    divisão por tentativa, por `rounds` iterações do algoritmo de Hart e pelo
+    SQUFOF, todos vetorizados, de modo que milhares de cofatores avançam juntos a
+    cada operação; os demais, e os que a versão vetorizada não resolver, caem na
+    versão escalar.
+    Exemplo: factor_small_batch([15, 17, 10201030027]) => [3, None, 2251]'''
+    numbers = list(numbers)
+    factors = [None] * len(numbers)
+    pending = []
+    for i, n in enumerate(numbers):
+        if not 0 < n < SMALL_LIMIT: raise ValueError(f"Called factor_small_batch() on n={n}, outside of [1, 2^64).")
+        if n >= 4 and not prime_miller_rabin(n): pending.append(i)
+    if np is not None:
+        vector = [i for i in pending if numbers[i] < VECTOR_LIMIT]
+        pending = [i for i in pending if numbers[i] >= VECTOR_LIMIT]
+        index = np.array(vector, dtype=np.int64)
+        N = np.array([numbers[i] for i in vector], dtype=np.int64)
+        d = np.zeros_like(N)
+        for p in SMALL_PRIMES:
+            d[(d == 0) & (N % p == 0)] = p
+        rest = d == 0
+        d[rest] = _hart_vector(N[rest], rounds)
+        for k in SQUFOF_MULTIPLIERS[:VECTOR_MULTIPLIERS]:
+            rest = (d == 0) & (_isqrt_vector(k * N) ** 2 != k * N)
+            if rest.any(): d[rest] = _squfof_vector(N[rest], k)
+        for i, di in zip(index.tolist(), d.tolist()):
+            if di: factors[i] = di
+            else: pending.append(i)
+    for i in pending:
+        factors[i] = factor_small(numbers[i])
+    return factors
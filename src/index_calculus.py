@@ -0,0 +1,91 @@
+from random import randint
+
+from src.base import prod
+from src.factorization import factor_with_limited_primes
+from src.linalg import SparseSystemMod
+from src.modular_arithmetic import powmod
+from src.primality import eratosthenes_sieve
+from src.quadratic_sieve import find_B
+from src.util import Deadline
+
+
+class IndexCalculus:
+    '''Cálculo do índice para logaritmos discretos módulo um primo p, na base g,
+    com resultados módulo um primo q que divide p - 1 (e tal que g^((p-1)/q) != 1).
+    Na construção, coletam-se relações g^k = p1^e1 * ... * pr^er mod p sobre uma base
+    de fatores de primos até B, e o sistema k = sum(e_i * log(p_i)) mod q é resolvido
+    com álgebra linear esparsa. Depois disso, cada logaritmo individual custa apenas
+    uma busca por um h * g^k mod p que seja B-smooth (descida).
+    Complexidade: L_p[1/2] para a pré-computação; cada log individual é bem mais barato.'''
+    def __init__(self, g: int, p: int, q: int, timeout: int=15, deadline: Deadline=None):
+        if (p - 1) % q != 0: raise ValueError("q must divide p - 1.")
+        if powmod(g, (p - 1) // q, p) == 1: raise ValueError("g must have order divisible by q.")
+        self.g, self.p, self.q = g, p, q
+        self.primes = eratosthenes_sieve(min(find_B(p), p - 1))
+        self.P = prod(self.primes)
+        self.logs = self.solve_factor_base(deadline or Deadline(timeout))
+
+    def is_smooth(self, y: int) -> bool:
+        '''Verifica se y é B-smooth: y divide P^(2^t), com P o produto da base de
+        fatores e 2^t >= log2(y), se e somente se P^(2^t) = 0 mod y.'''
+        if y == 1: return True
+        r = self.P % y
+        for _ in range(y.bit_length().bit_length()):
+            r = r * r % y
+        return r == 0
+
+    def relations(self, h: int, deadline: Deadline):
+        '''Gera pares (k, potências) tais que h * g^k mod p é B-smooth. Os valores de
+        k são consecutivos a partir de um ponto aleatório, com uma multiplicação
+        por passo.'''
+        k = randint(1, self.p - 2)
+        y = h * powmod(self.g, k, self.p) % self.p
+        steps = 0
+        while True:
+            steps += 1
+            if steps % deadline.every == 0: deadline.tick('relations', steps)
+            if self.is_smooth(y):
+                powers, _u = factor_with_limited_primes(y, self.primes)
+                yield k, powers
+            k += 1
+            y = y * self.g % self.p
+
+    def solve_factor_base(self, deadline: Deadline) -> dict[int, int]:
+        '''Calcula log(p_i) mod q para todos os primos da base de fatores.'''
+        system = SparseSystemMod(len(self.primes), self.q)
+        for k, powers in self.relations(1, deadline):
+            system.add_row({i: powers[p] for i, p in enumerate(self.primes) if powers[p]}, k)
+            x = system.solution()
+            if x is not None:
+                return dict(zip(self.primes, x))
+
+    def log(self, h: int, deadline: Deadline=None) -> int:
+        '''Retorna x mod q tal que g^x = h mod p, usando os logs já calculados da
+        base de fatores.'''
+        h %= self.p
+        if h == 0: raise ValueError("h must be invertible mod p.")
+        k, powers = next(self.relations(h, deadline or Deadline(15)))
+        return (sum(e * self.logs[p] for p, e in powers.items()) - k) % self.q
+
+_contexts: dict[tuple[int, int, int], IndexCalculus] = {}
+
+def index_calculus_context(g: int, p: int, q: int, deadline: Deadline=None) -> IndexCalculus:
+    '''Retorna o contexto de cálculo do índice para (g, p, q), reaproveitando os
+    logs da base de fatores já calculados. Apenas os 16 contextos mais recentes
+    são mantidos.'''
+    key = (g, p, q)
+    if key in _contexts:
+        _contexts[key] = _contexts.pop(key)
+        return _contexts[key]
+    context = IndexCalculus(g, p, q, deadline=deadline)
+    _contexts[key] = context
+    if len(_contexts) > 16: _contexts.pop(next(iter(_contexts)))
+    return context
+
+def index_calculus_log(g: int, h: int, p: int, q: int, deadline: Deadline=None) -> int:
+    '''Calcula x mod q tal que g^x = h mod p, onde p é primo e q é um fator primo de
+    p - 1. A pré-computação é guardada em cache por (g, p, q), de modo que logs
+    seguintes com a mesma base custam apenas uma descida.
+    Exemplo: index_calculus_log(5, 3, 1000000007, 500000003) => x, com
+    5^x = 3 mod 1000000007 no subgrupo de ordem 500000003.'''
+    return index_calculus_context(g, p, q, deadline).log(h, deadline)
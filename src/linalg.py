@@ -100,3 +100,62 @@ def kernel(A: sympy.Matrix | Matrix) -> Matrix:
     A = sympy.Matrix(A)
     ker: list[sympy.Matrix] = A.nullspace()
     return [list(u.transpose()) for u in ker]
+
+class SparseSystemMod:
+    '''Sistema linear esparso A * x = b mod q, q primo, com colunas em [0, m),
+    escalonado incrementalmente pelo método de Gauss-Jordan: cada linha nova é
+    reduzida pelos pivôs existentes, e um pivô novo é eliminado das linhas
+    anteriores. As linhas são dicionários {coluna: coeficiente}; a matriz densa
+    nunca é montada, e linhas dependentes são descartadas.'''
+    def __init__(self, m: int, q: int):
+        self.m, self.q = m, q
+        self.pivots: dict[int, tuple[dict[int, int], int]] = {}
+
+    def rank(self) -> int:
+        return len(self.pivots)
+
+    def add_row(self, row: dict[int, int], b: int) -> bool:
+        '''Adiciona a equação row * x = b. Retorna True se o posto aumentou.'''
+        q = self.q
+        row = {j: c % q for j, c in row.items() if c % q}
+        b %= q
+        for j in [j for j in row if j in self.pivots]:
+            c = row.pop(j)
+            pivot_row, pivot_b = self.pivots[j]
+            for k, v in pivot_row.items():
+                w = (row.get(k, 0) - c * v) % q
+                if w: row[k] = w
+                else: row.pop(k, None)
+            b = (b - c * pivot_b) % q
+        if not row: return False
+        j = min(row)
+        inv = pow(row.pop(j), -1, q)
+        row = {k: v * inv % q for k, v in row.items()}
+        b = b * inv % q
+        for i, (pivot_row, pivot_b) in self.pivots.items():
+            if j not in pivot_row: continue
+            c = pivot_row.pop(j)
+            for k, v in row.items():
+                w = (pivot_row.get(k, 0) - c * v) % q
+                if w: pivot_row[k] = w
+                else: pivot_row.pop(k, None)
+            self.pivots[i] = (pivot_row, (pivot_b - c * b) % q)
+        self.pivots[j] = (row, b)
+        return True
+
+    def solution(self) -> list[int] | None:
+        '''Retorna x, ou None caso o posto do sistema ainda seja menor que m.'''
+        if len(self.pivots) < self.m: return None
+        return [self.pivots[j][1] for j in range(self.m)]
+
+def solve_mod_prime(rows: list[dict[int, int]], rhs: list[int], m: int, q: int) -> list[int] | None:
+    '''Resolve o sistema linear esparso A * x = rhs mod q, onde q é primo e cada linha
+    de A é um dicionário {coluna: coeficiente} com colunas em [0, m).
+    Retorna x, ou None caso o posto do sistema seja menor que m.
+    Complexidade: O(R * m * w), onde R é o número de linhas e w o número médio
+    de entradas não nulas por linha após o preenchimento.'''
+    system = SparseSystemMod(m, q)
+    for row, b in zip(rows, rhs):
+        system.add_row(row, b)
+        if system.rank() == m: break
+    return system.solution()
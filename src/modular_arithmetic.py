@@ -1,35 +1,100 @@
-from time import time
-from random import randint
+from functools import lru_cache
+from operator import mul
 
-from src.base import prod, gcd_extended, gcd, oddify
-from src.util import error, Powers
+from src.backend import accelerated, BACKEND
+from src.base import prod, gcd_extended, gcd, oddify, product_tree, remainder_tree
+from src.util import Deadline, Powers
 
+@accelerated
 def invmod(a:int, n:int) -> int:
     '''Retorna b tal que a * b = 1 mod n. Complexidade: a mesma de
     `gcd_extended()`.
     Exemplo: invmod(2, 7) => 4'''
     if -2 < n < 2: return 0
     d, alfa, _beta = gcd_extended(a, n)
+    # Com entradas negativas, o MDC pode vir com sinal trocado: d = -1 também serve.
+    if d == -1: d, alfa = 1, -alfa
     if d != 1:
         return 0
     return alfa % n
 
+class CRT:
+    '''Contexto pré-computado do Teorema Chinês do Resto para uma lista fixa de
+    módulos dois a dois coprimos, usando o algoritmo de Garner. Tudo o que não
+    depende dos resíduos é calculado uma única vez: os inversos
+    (m0*m1*...*m_{i-1})^-1 mod m_i, os coeficientes (m0*...*m_{j-1}) mod m_i de cada
+    nível e os produtos m0*...*m_{j-1} da base mista. Assim, cada reconstrução usa
+    apenas produtos escalares com inteiros do tamanho dos módulos, até a montagem
+    final do resultado.
+    Exemplo:
+    crt = CRT([3, 5, 7])
+    crt.solve([2, 3, 2]) => 23
+    crt.solve_many([[2, 3, 2], [1, 1, 1]]) => [23, 1]
+    '''
+    def __init__(self, moduli: list[int]):
+        self.moduli = list(moduli)
+        self.N = prod(self.moduli)
+        self.inverses = []
+        self.coefficients = []
+        self.radix = []
+        prefix = 1
+        for m in self.moduli:
+            if m < 1: raise ValueError("CRT moduli must be pairwise coprime positive integers.")
+            row = [M % m for M in self.radix]
+            self.radix.append(prefix)
+            inv = invmod(prefix, m) if m > 1 else 0
+            if m > 1 and inv == 0:
+                raise ValueError("CRT moduli must be pairwise coprime positive integers.")
+            self.coefficients.append(row)
+            self.inverses.append(inv)
+            prefix *= m
+
+    def digits(self, A: list[int]) -> list[int]:
+        '''Retorna os dígitos v_i da representação em base mista de x, tais que
+        x = v0 + m0*(v1 + m1*(v2 + ...)). Complexidade: O(k²) operações com
+        inteiros pequenos, onde k é o número de módulos.'''
+        return self.digits_many([A])[0]
+
+    def digits_many(self, vectors: list[list[int]]) -> list[list[int]]:
+        '''Versão de `digits()` para vários vetores: os dígitos são calculados nível
+        a nível, com os coeficientes e o inverso de cada nível compartilhados por
+        todos os vetores.'''
+        k = len(self.moduli)
+        if any(len(A) != k for A in vectors): raise ValueError("Called CRT.solve() with the wrong number of residues.")
+        V = [[] for _ in vectors]
+        for i, (m, inv, row) in enumerate(zip(self.moduli, self.inverses, self.coefficients)):
+            for A, v in zip(vectors, V):
+                v.append((A[i] - sum(map(mul, v, row))) * inv % m)
+        return V
+
+    def solve(self, A: list[int]) -> int:
+        '''Retorna x em [0, prod(moduli)) tal que x = A[i] mod moduli[i].'''
+        return self.solve_many([A])[0]
+
+    def solve_many(self, vectors: list[list[int]]) -> list[int]:
+        '''Reconstrói vários vetores de resíduos sobre os mesmos módulos. Cada x é
+        montado como sum(v_j * m0*...*m_{j-1}), com os produtos da base mista
+        calculados na construção do contexto.'''
+        return [sum(map(mul, v, self.radix)) for v in self.digits_many(vectors)]
+
+@lru_cache(maxsize=128)
+def crt_context(moduli: tuple[int, ...]) -> CRT:
+    '''Retorna o contexto `CRT` para os módulos dados, reaproveitando contextos
+    já construídos para a mesma tupla de módulos.'''
+    return CRT(moduli)
+
 def congruence_system(A: list[int], n: list[int]) -> int:
     '''
     Usa o Algoritmo Chinês do Resto para calcular o resultado do 
     sistema de congruências x = A[i] mod n[i], 0 <= i < len(A).
-    O resultado é dado em mod prod(n). Complexidade: O(S * log(A[k])),
-    onde S é o tamanho dos vetores A e n, e k é o índice de n onde n[k]
-    é máximo.'''
+    O resultado é dado em mod prod(n). O contexto de Garner para os módulos n é
+    guardado em cache, então chamadas repetidas com os mesmos módulos fazem apenas
+    aritmética com inteiros pequenos. Complexidade: O(S²) operações com inteiros
+    do tamanho de n[i], onde S é o tamanho dos vetores A e n.'''
     if len(A) != len(n): raise ValueError("Called congruence_system() with different-sized lists.")
-    N = prod(n)
-    result = 0
-    for i, a in enumerate(A):
-        p = N // n[i]
-        x = invmod(p, n[i])
-        result += a * x * p
-    return result % N
+    return crt_context(tuple(n)).solve(A)
 
+@accelerated
 def powmod(b:int, e:int, n:int) -> int:
     '''Retorna b^e mod n usando exponenciação binária. 
     Complexidade: O(log(n)).
@@ -45,6 +110,99 @@ def powmod(b:int, e:int, n:int) -> int:
         A = (A * A) % n
     return P
 
+def multi_powmod(pairs: list[tuple[int, int]], n: int, window: int=4) -> int:
+    '''Retorna b1^e1 * b2^e2 * ... * bk^ek mod n usando a técnica de
+    Straus/Shamir: as k exponenciações compartilham uma única sequência de
+    quadrados. As bases são agrupadas de `window` em `window`, e para cada grupo
+    pré-computa-se o produto de todos os seus subconjuntos (2^window entradas).
+    Complexidade: O(log(E) + k/window * (log(E) + 2^window)), onde E é o
+    maior expoente, contra O(k * log(E)) de k chamadas a `powmod()`.
+    Com o backend gmpy2, cada potência é calculada pela GMP, que é mais rápida que
+    a cadeia compartilhada em Python.
+    Exemplo: multi_powmod([(2, 5), (3, 2)], 7) => 1'''
+    if abs(n) < 2: raise ValueError('n must be an integer with abs(n) > 1.')
+    if BACKEND == 'gmpy2' and n > 1:
+        P = 1
+        for b, e in pairs:
+            P = P * powmod(b, e, n) % n
+        return P
+    bases, exps = [], []
+    for b, e in pairs:
+        if e < 0:
+            b, e = invmod(b, n), -e
+        if e == 0: continue
+        bases.append(b % n)
+        exps.append(e)
+    if not bases: return 1
+    tables = []
+    for i in range(0, len(bases), window):
+        group = bases[i:i + window]
+        table = [1] * (1 << len(group))
+        for j, b in enumerate(group):
+            bit = 1 << j
+            for mask in range(bit):
+                table[bit | mask] = table[mask] * b % n
+        tables.append(table)
+    P = 1
+    for k in range(max(exps).bit_length() - 1, -1, -1):
+        P = P * P % n
+        for t, table in enumerate(tables):
+            mask = 0
+            for j, e in enumerate(exps[t * window:(t + 1) * window]):
+                mask |= ((e >> k) & 1) << j
+            if mask:
+                P = P * table[mask] % n
+    return P
+
+class PowmodContext:
+    '''Contexto de exponenciação modular b -> b^e mod n para e e n fixos. A
+    recodificação de e em janelas deslizantes de até `window` bits é feita uma única
+    vez, de forma que cada chamada só precisa calcular as potências ímpares
+    b, b³, ..., b^(2^window - 1) e percorrer a sequência pronta de quadrados e
+    multiplicações. Útil quando o mesmo expoente é usado muitas vezes, como no RSA.
+    Com o backend gmpy2, a chamada é repassada a `powmod()`.
+    Exemplo:
+    cube = PowmodContext(3, 11)
+    cube(2) => 8'''
+    def __init__(self, e: int, n: int, window: int=None):
+        if abs(n) < 2: raise ValueError('n must be an integer with abs(n) > 1.')
+        if e < 0: raise ValueError('e must be a non-negative integer.')
+        self.e, self.n = e, n
+        bits = e.bit_length()
+        if window is None:
+            window = 1 if bits <= 8 else 3 if bits <= 64 else 4 if bits <= 256 else 5 if bits <= 1024 else 6
+        self.window = window
+        self.schedule: list[tuple[int, int]] = []
+        i, squares = bits - 1, 0
+        while i >= 0:
+            if (e >> i) & 1 == 0:
+                squares += 1
+                i -= 1
+                continue
+            j = max(i - window + 1, 0)
+            while (e >> j) & 1 == 0:
+                j += 1
+            digit = (e >> j) & ((1 << (i - j + 1)) - 1)
+            self.schedule.append((squares + i - j + 1, digit))
+            squares = 0
+            i = j - 1
+        if squares: self.schedule.append((squares, 0))
+
+    def __call__(self, b: int) -> int:
+        n = self.n
+        if BACKEND == 'gmpy2' and n > 1: return powmod(b, self.e, n)
+        b %= n
+        b2 = b * b % n
+        table = {1: b}
+        for d in range(3, 1 << self.window, 2):
+            table[d] = table[d - 2] * b2 % n
+        P = 1
+        for squares, digit in self.schedule:
+            for _ in range(squares):
+                P = P * P % n
+            if digit: P = P * table[digit] % n
+        return P % n
+
 def order(g:int, n:int, phi:int, f:Powers) -> int:
     '''Calcula a ordem de g mod n, conhecendo phi = totient(n) e a fatorização
     f de phi, phi = p1^e1*p2^e2*p3^e3..p_k^e_k. Complexidade: O(k * e_t), onde 
@@ -77,9 +235,46 @@ def is_generator(g:int, n:int, phi:int, factors:Powers):
         if powmod(g, k, n) == 1: return False
     return True
 
+@accelerated
+def jacobi(a: int, n: int) -> int:
+    '''Calcula o símbolo de Jacobi (a/n), para n ímpar e positivo, usando a lei
+    de reciprocidade quadrática. Quando n é primo, coincide com o símbolo de
+    Legendre. Complexidade: O(log(min(a, n))), a mesma do MDC.
+    Exemplo: jacobi(2, 7) => 1'''
+    if n < 1 or n % 2 == 0: raise ValueError('n must be an odd positive integer.')
+    a %= n
+    result = 1
+    while a != 0:
+        while a % 2 == 0:
+            a //= 2
+            if n % 8 in (3, 5): result = -result
+        a, n = n, a
+        if a % 4 == 3 and n % 4 == 3: result = -result
+        a %= n
+    return result if n == 1 else 0
+
+def residues(a: int, primes: list[int]) -> list[int]:
+    '''Retorna a mod p para todos os p em `primes`, usando uma árvore de restos
+    caso a seja grande o suficiente para compensar.
+    Exemplo: residues(100, [3, 7, 11]) => [1, 2, 1]'''
+    if a.bit_length() > 8192:
+        return remainder_tree(a, product_tree(primes))
+    return [a % p for p in primes]
+
+def legendre_symbols(a: int, primes: list[int]) -> list[int]:
+    '''Retorna os símbolos de Legendre (a/p) para todos os primos p em `primes`.
+    Para p = 2, retorna a mod 2. Primeiro a é reduzido módulo todos os primos de uma
+    vez, com `residues()`, e então os símbolos são calculados pelo critério de Euler,
+    r^((p-1)/2) mod p, com o `pow()` nativo sobre os restos pequenos: para p de uma
+    palavra, isso é mais rápido que o laço de `jacobi()` em Python.
+    Complexidade: O(k * log(p)) para k primos de tamanho p, mais a redução de a.'''
+    return [r % 2 if p == 2 else -1 if (s := pow(r, (p - 1) // 2, p)) == p - 1 else s
+            for r, p in zip(residues(a, primes), primes)]
+
 def is_square(a: int, p: int) -> bool:
-    '''Verifica se a é um resíduo quadrático módulo p usando o símbolo de Legendre.
+    '''Verifica se a é um resíduo quadrático módulo p pelo critério de Euler.
     p deve ser um número primo.'''
+    if p == 2: return True
     return pow(a, (p - 1) // 2, p) == 1
 
 def find_non_square(p: int) -> int:
@@ -100,21 +295,45 @@ def msqrt(a: int, p:int,  d: int) -> int:
             m += pow(2,j-1)
     return (pow(a, (t+1)//2, p) * pow(D, m//2, p)) % p
 
-def find_generator(n:int, phi:int, f:dict[int,int], timeout:int=15) -> int:
-    '''Algoritmo probabilístico para achar um gerador g do grupo de inteiros
-    x tais que gcd(x, totient(n)) == 1.
-    Complexidade: O(totient(n - 1) * r * log(n))'''
-    start = time()
-    h = 1
-    while time() - start < timeout:
-        g = randint(2, phi - 1)
-        for p, e in f.items():
-            d = phi // p
-            if powmod(g, d, n) == 1:
-                h = h * powmod(g, phi // p**e, n) % n
-                break
+_generators: dict[tuple[int, int], int] = {}
+
+def find_generator(n:int, phi:int, f:dict[int,int], timeout:int=15, deadline:Deadline=None) -> int:
+    '''Acha um gerador g do grupo multiplicativo mod n, de ordem phi, conhecendo a
+    fatoração f de phi. Os candidatos 2, 3, 4, ... são testados em ordem, com os
+    expoentes phi // p calculados uma única vez. Cada candidato a tal que
+    a^(phi/p) != 1 é guardado como testemunha do primo p; assim que todos os primos
+    têm testemunhas, o gerador é montado pela construção de Gauss:
+    g = prod(w_p^(phi / p^e)), que tem ordem prod(p^e) = phi.
+    O resultado é guardado em cache para o par (n, phi); apenas os 128 pares usados
+    mais recentemente são mantidos. Se o prazo esgotar, a
+    exceção TimeoutExceeded traz em `partial` o elemento de maior ordem já montado.
+    Complexidade: O(c * r * log(n)), onde c é o número de candidatos testados e r
+    o número de primos distintos de phi.'''
+    if (n, phi) in _generators:
+        _generators[n, phi] = _generators.pop((n, phi))
+        return _generators[n, phi]
+    deadline = deadline or Deadline(timeout)
+    exponents = {p: phi // p for p in f.keys()}
+    witnesses = {}
+    def partial():
+        h = multi_powmod([(w, phi // p**f[p]) for p, w in witnesses.items()], n)
+        return {'generator': h, 'order': order(h, n, phi, f)}
+    for a in range(2, n):
+        if a % deadline.every == 0: deadline.tick('generator', a, partial)
+        if gcd(a, n) != 1: continue
+        passed = True
+        for p, d in exponents.items():
+            if powmod(a, d, n) == 1:
+                passed = False
+            elif p not in witnesses:
+                witnesses[p] = a
+        if passed:
+            g = a
+        elif len(witnesses) == len(exponents):
+            g = multi_powmod([(w, phi // p**f[p]) for p, w in witnesses.items()], n)
         else:
-            return g
-    print(f"Elemento de maior ordem encontrado: g'={h}")
-    print("Ordem de g':", order(h, n, phi, f))
-    error(f"Tempo excedido: não foi possível encontrar um gerador. Limite de tempo: {timeout}")
+            continue
+        _generators[n, phi] = g
+        if len(_generators) > 128: _generators.pop(next(iter(_generators)))
+        return g
+    raise ValueError(f"Failed to find a generator: the group mod {n} is not cyclic of order {phi}.")
@@ -1,6 +1,7 @@
 from random import randint
 from collections import defaultdict
 
+from src.backend import accelerated
 from src.base import gcd, ilog10, oddify
 from src.modular_arithmetic import powmod
 
@@ -22,14 +23,15 @@ def miller_test(n:int, b:int, k: int, q: int):
     '''
     if n == 2 or n == -2: return True
     if n % 2 == 0: return False
-    if gcd(n, b) != 1: return True
+    if gcd(n, b) != 1: return False
     r = powmod(b, q, n)
     if r == 1 or r == n - 1: return True
-    for _ in range(k):
+    for _ in range(k - 1):
         r = powmod(r, 2, n)
         if r == n - 1: return True
     return False
 
+@accelerated
 def prime_miller_rabin(n:int, primes:list[int]=None, rep:int=None):
     '''Executa `rep` iterações com bases aleatórias do teste de Miller 
     para checar se n é primo. Returna True se o número provavelmente é primo,
@@ -1,14 +1,16 @@
+import json
 from math import exp, sqrt, log, ceil
 from itertools import product
 from collections import OrderedDict, defaultdict
-from time import time
+from time import perf_counter
+from typing import TextIO
 
-from src.base import isqrt, gcd
-from src.factorization import factor_with_limited_primes
+from src.base import isqrt, gcd, perfect_power
+from src.factorization import factor_with_limited_primes, factor_small, SMALL_LIMIT
 from src.linalg import Matrix, Vector, transpose, kernel, sum_vectors, scale_vector, vector_mod, matrix_mod
-from src.modular_arithmetic import is_square, msqrt
+from src.modular_arithmetic import legendre_symbols, msqrt, multi_powmod
 from src.primality import eratosthenes_sieve
-from src.util import Powers, error
+from src.util import Deadline, Powers
 
 
 def find_B(n: int) -> int:
@@ -18,8 +20,9 @@ def find_B(n: int) -> int:
 
 def euler_sieve_method(n: int, primes: list[int]) -> list[int]:
     '''Criva os primos de acordo com o critério de Euler; ou seja, filtra a lista de primos
-    para deixar apenas aqueles fazem n ser quadrado mod p.'''
-    return list(filter(lambda p: is_square(n, p), primes))
+    para deixar apenas aqueles fazem n ser quadrado mod p. O primo 2 é sempre mantido.
+    Os símbolos de Legendre de n são calculados de uma vez por `legendre_symbols()`.'''
+    return [p for p, s in zip(primes, legendre_symbols(n, primes)) if p == 2 or s == 1]
 
 def setup(n: int):
     B = find_B(n)
@@ -82,46 +85,161 @@ def isqrt_powers(decomp: Powers) -> Powers:
         decomp[p] = alpha // 2
     return decomp
 
-def compose(decomp: Powers) -> int:
+def compose(decomp: Powers, n: int=None) -> int:
+    '''Reconstrói o número a partir de sua decomposição em primos. Se n for
+    passado, o produto é calculado mod n com `multi_powmod()`, compartilhando
+    uma única cadeia de quadrados entre todas as potências.'''
+    if n is not None:
+        return multi_powmod(decomp.items(), n)
     acc = 1
     for p, alpha in decomp.items():
         acc *= p**alpha
     return acc
 
-def compose_from_solution(S: OrderedDict[int, Powers], solution: list[int]) -> int:
+def compose_from_solution(S: OrderedDict[int, Powers], solution: list[int], n: int=None) -> int:
     prod = 1
     decomp = defaultdict(lambda: 0)
     for i, (guess, powers) in enumerate(S.items()):
         if solution[i] == 1:
             prod *= guess
+            if n is not None: prod %= n
             decomp = join_powers(decomp, powers)
     decomp = isqrt_powers(decomp)
-    return prod, compose(decomp)
+    return prod, compose(decomp, n)
 
-def quadratic_sieve(n: int) -> int:
+class SieveStats:
+    '''Estatísticas de uma execução de `quadratic_sieve()`, por fase: fatoração de
+    números pequenos ('small'), preparação da base de fatores ('setup'), coleta de relações ('relations'), álgebra linear
+    ('linear_algebra') e raiz quadrada / MDC ('square_root'). Os tempos são de
+    relógio, em segundos. As contagens são derivadas dos índices dos laços, então
+    coletar estatísticas não acrescenta trabalho por iteração.'''
+    def __init__(self):
+        self.n = None
+        self.method = None
+        self.status = None
+        self.factor = None
+        self.B = None
+        self.factor_base_size = None
+        self.phases: dict[str, float] = {}
+        self.candidates = 0
+        self.relations = 0
+        self.matrix_shape = (0, 0)
+        self.dependencies = 0
+        self.dependencies_tried = 0
+        self._phase, self._start = None, None
+
+    def phase(self, name: str | None):
+        '''Encerra a fase atual e, se `name` não for None, começa uma nova.'''
+        now = perf_counter()
+        if self._phase is not None:
+            self.phases[self._phase] = self.phases.get(self._phase, 0.0) + now - self._start
+        self._phase, self._start = name, now
+
+    @property
+    def relations_per_second(self) -> float:
+        elapsed = self.phases.get('relations', 0.0)
+        return self.relations / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def smooth_yield(self) -> float:
+        '''Fração dos candidatos xj testados cujo xj² mod n foi B-smooth.'''
+        return self.relations / self.candidates if self.candidates else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'n': self.n,
+            'method': self.method,
+            'status': self.status,
+            'factor': self.factor,
+            'B': self.B,
+            'factor_base_size': self.factor_base_size,
+            'phases': self.phases,
+            'candidates': self.candidates,
+            'relations': self.relations,
+            'relations_per_second': self.relations_per_second,
+            'smooth_yield': self.smooth_yield,
+            'matrix_shape': list(self.matrix_shape),
+            'dependencies': self.dependencies,
+            'dependencies_tried': self.dependencies_tried,
+        }
+
+    def emit(self, file: TextIO):
+        '''Escreve as estatísticas como uma linha JSON em `file`.'''
+        file.write(json.dumps(self.to_dict()) + '\n')
+
+def quadratic_sieve(n: int, timeout: int=15, deadline: Deadline=None, stats: SieveStats=None,
+                    emit: TextIO=None, small_limit: int=SMALL_LIMIT) -> int:
     '''Implementação do crivo quadrático baseada em Collier:
-    https://www.dcc.ufrj.br/~collier/CursosGrad/topicos/CrivoQuadratico.html'''
-    start = time()
+    https://www.dcc.ufrj.br/~collier/CursosGrad/topicos/CrivoQuadratico.html
+    Potências perfeitas n = r^k são tratadas antes de qualquer crivo, retornando r,
+    e números menores que `small_limit` (por padrão, 2^64) são fatorados por
+    `factor_small()`, sem montar uma base de fatores.
+    Se o prazo esgotar, a exceção TimeoutExceeded traz em `partial` as relações
+    B-smooth coletadas até então.
+    Se um objeto `stats` for passado, ele é preenchido com as estatísticas de cada
+    fase; se `emit` for um arquivo, as estatísticas são escritas nele como uma linha
+    JSON ao final, inclusive quando a execução falha.'''
+    if stats is None and emit is not None:
+        stats = SieveStats()
+    if stats is None:
+        return _quadratic_sieve(n, deadline or Deadline(timeout), None, small_limit)
+    stats.n = n
+    try:
+        stats.factor = _quadratic_sieve(n, deadline or Deadline(timeout), stats, small_limit)
+        stats.status = 'ok'
+        return stats.factor
+    except Exception as e:
+        stats.status = type(e).__name__
+        raise
+    finally:
+        stats.phase(None)
+        if emit is not None: stats.emit(emit)
+
+def _quadratic_sieve(n: int, deadline: Deadline, stats: SieveStats | None, small_limit: int) -> int:
+    r, k = perfect_power(n)
+    if k > 1:
+        if stats: stats.method = 'perfect_power'
+        return r
+    if n < small_limit:
+        if stats:
+            stats.method = 'factor_small'
+            stats.phase('small')
+        return factor_small(n)
+    if stats:
+        stats.method = 'quadratic_sieve'
+        stats.phase('setup')
     S: OrderedDict[int, Powers] = OrderedDict()
     B, M, primes = setup(n)
-    x0 = ceil(sqrt(n))
-    for xj in range(x0, n):
-        if n % xj == 0: return xj
-        quadratic_sieve_aux(n, xj, S, primes)
-        if len(S) > M: break
-        if time() - start > 15:
-            error("Tempo limite excedido. Não foi possível fatorar n.")
+    if stats:
+        stats.B, stats.factor_base_size = B, len(primes)
+        stats.phase('relations')
+    x0 = xj = ceil(sqrt(n))
+    try:
+        for xj in range(x0, n):
+            if n % xj == 0: return xj
+            quadratic_sieve_aux(n, xj, S, primes)
+            if len(S) > M: break
+            if (xj - x0) % deadline.every == 0:
+                deadline.tick('relations', xj - x0, lambda: {'relations': dict(S)})
+    finally:
+        if stats: stats.candidates, stats.relations = xj - x0 + 1, len(S)
+    if stats: stats.phase('linear_algebra')
     if len(S) <= B:
         raise RuntimeError('Não foi possível construir um sistema de equações para n.')
     A = build_matrix_of_powers(S, primes)
     A = matrix_mod(A, 2)
     solutions = kernel_solutions(A)
-    for sol in solutions:
-        a, b = compose_from_solution(S, sol)
+    if stats:
+        stats.matrix_shape = (len(A), len(A[0]))
+        stats.dependencies = len(solutions)
+        stats.phase('square_root')
+    for i, sol in enumerate(solutions):
+        if stats: stats.dependencies_tried = i + 1
+        a, b = compose_from_solution(S, sol, n)
         assert (a**2) % n == b**2 % n
         d = abs(gcd(a - b, n))
         if d not in (1, n):
             return d
-        if time() - start > 15:
-            error("Tempo limite excedido. Não foi possível fatorar n.")
+        if i % deadline.every == 0:
+            deadline.tick('square_root', i, lambda: {'relations': dict(S)})
     raise RuntimeError('Não foi possível encontrar um fator não-trivial para n.')
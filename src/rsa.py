@@ -1,7 +1,18 @@
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
 from random import randint
+from typing import BinaryIO
 
 from src.primality import prime_miller_rabin
-from src.modular_arithmetic import invmod, powmod, gcd
+from src.modular_arithmetic import invmod, powmod, gcd, PowmodContext
+from src.util import Deadline
+
+
+# Expoente público convencional: primo, com apenas dois bits ligados, o que torna
+# a cifragem muito mais barata que a decifragem.
+PUBLIC_EXPONENT = 65537
 
 
 def random_prime(bits:int=1024, max_attempts:int=1000):
@@ -11,16 +22,67 @@ def random_prime(bits:int=1024, max_attempts:int=1000):
     raise ValueError("Failed to generate prime.")
 
 
-def generate_keys(bits:int=1024) -> tuple[int, int, int]:
-    p = random_prime(bits)
-    q = random_prime(bits)
-    n = p * q
-    phi = (p - 1) * (q - 1)
-    while True:
-        e = randint(2, phi)
-        if gcd(e, phi) == 1: break
-    f = invmod(e, phi)
-    return n, e, f
+class PublicKey:
+    '''Chave pública RSA (n, e). O contexto de exponenciação para e mod n é
+    guardado e reaproveitado por todas as cifragens.'''
+    def __init__(self, n: int, e: int=PUBLIC_EXPONENT):
+        self.n, self.e = n, e
+        self._encrypt = PowmodContext(e, n)
+
+    def encrypt(self, M: int) -> int:
+        return self._encrypt(M)
+
+
+class PrivateKey(PublicKey):
+    '''Chave privada RSA que guarda os primos p e q e os parâmetros do Teorema
+    Chinês do Resto: dP = d mod (p - 1), dQ = d mod (q - 1) e qInv = q^-1 mod p.
+    A decifragem faz duas exponenciações com módulos e expoentes da metade do
+    tamanho, cerca de 4x mais rápido que powmod(C, d, n), e os contextos de
+    exponenciação para p e q são calculados uma única vez por chave.'''
+    def __init__(self, p: int, q: int, e: int=PUBLIC_EXPONENT):
+        super().__init__(p * q, e)
+        self.p, self.q = p, q
+        self.d = invmod(e, (p - 1) * (q - 1))
+        if self.d == 0: raise ValueError("e must be coprime with (p - 1) * (q - 1).")
+        self.dP = self.d % (p - 1)
+        self.dQ = self.d % (q - 1)
+        self.qInv = invmod(q, p)
+        self._decrypt_p = PowmodContext(self.dP, p)
+        self._decrypt_q = PowmodContext(self.dQ, q)
+
+    def public_key(self) -> PublicKey:
+        return PublicKey(self.n, self.e)
+
+    def decrypt(self, C: int) -> int:
+        m1 = self._decrypt_p(C % self.p)
+        m2 = self._decrypt_q(C % self.q)
+        h = self.qInv * (m1 - m2) % self.p
+        return m2 + h * self.q
+
+
+def generate_private_key(bits:int=1024, e:int=None, deadline:Deadline=None,
+                         max_attempts:int=1000) -> PrivateKey:
+    '''Gera uma chave privada com primos p != q de até `bits` bits tais que
+    gcd(e, p - 1) = gcd(e, q - 1) = 1. Se e não for passado, usa PUBLIC_EXPONENT,
+    ou 3 quando `bits` não comporta primos maiores que PUBLIC_EXPONENT. Levanta
+    ValueError se e não couber em `bits` bits ou se `max_attempts` primos
+    sorteados forem rejeitados. O `deadline`, se passado, é verificado a cada
+    primo sorteado.'''
+    if e is None: e = PUBLIC_EXPONENT if 2**bits > PUBLIC_EXPONENT else 3
+    if 2**bits + 1 <= e: raise ValueError(f"No prime of {bits} bits is larger than e = {e}.")
+    primes = []
+    for _ in range(max_attempts):
+        if deadline is not None: deadline.check()
+        p = random_prime(bits)
+        if p > e and gcd(e, p - 1) == 1 and p not in primes:
+            primes.append(p)
+            if len(primes) == 2: return PrivateKey(primes[0], primes[1], e)
+    raise ValueError("Failed to generate two suitable primes.")
+
+
+def generate_keys(bits:int=1024, deadline:Deadline=None) -> tuple[int, int, int]:
+    key = generate_private_key(bits, deadline=deadline)
+    return key.n, key.e, key.d
 
 
 def encode(M: int, e: int, n: int) -> int:
@@ -28,3 +90,72 @@ def encode(M: int, e: int, n: int) -> int:
 
 def decode(C: int, f: int, n: int) -> int:
     return powmod(C, f, n)
+
+
+def block_sizes(n: int) -> tuple[int, int]:
+    '''Retorna o tamanho em bytes dos blocos de texto claro e de texto cifrado
+    para o módulo n. Cada bloco claro recebe um byte 0x01 à esquerda antes de
+    virar inteiro, para preservar zeros iniciais e blocos curtos, e ainda assim
+    ficar abaixo de n.'''
+    k = (n.bit_length() - 1) // 8 - 1
+    if k < 1: raise ValueError("n is too small to encrypt byte streams.")
+    return k, (n.bit_length() + 7) // 8
+
+def read_blocks(source: BinaryIO | Iterable[bytes], size: int) -> Iterator[bytes]:
+    '''Divide um arquivo binário (qualquer objeto com `read`) ou um iterável de
+    bytes em blocos de `size` bytes; apenas o último pode ser menor. Usa memória
+    proporcional a `size`, independente do tamanho da entrada.'''
+    if hasattr(source, 'read'):
+        source = iter(partial(source.read, size), b'')
+    buffer = bytearray()
+    for piece in source:
+        buffer += piece
+        while len(buffer) >= size:
+            yield bytes(buffer[:size])
+            del buffer[:size]
+    if buffer: yield bytes(buffer)
+
+def encrypt_block(key: PublicKey, block: bytes) -> bytes:
+    _k, size = block_sizes(key.n)
+    M = int.from_bytes(b'\x01' + block, 'big')
+    return key.encrypt(M).to_bytes(size, 'big')
+
+def decrypt_block(key: PrivateKey, block: bytes) -> bytes:
+    M = key.decrypt(int.from_bytes(block, 'big'))
+    return M.to_bytes((M.bit_length() + 7) // 8, 'big')[1:]
+
+def _map_blocks(f, blocks: Iterator[bytes], workers: int, batch: int) -> Iterator[bytes]:
+    '''Aplica f aos blocos, em ordem. Com workers > 1, os blocos são lidos em lotes
+    de workers * batch e distribuídos em um pool de processos, de modo que a memória
+    usada continua limitada ao tamanho do lote.'''
+    if workers <= 1:
+        yield from map(f, blocks)
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        while chunk := list(islice(blocks, workers * batch)):
+            yield from pool.map(f, chunk, chunksize=batch)
+
+def encrypt_stream(source: BinaryIO | Iterable[bytes], key: PublicKey, workers: int=1,
+                   batch: int=64) -> Iterator[bytes]:
+    '''Cifra um fluxo de bytes sob demanda, retornando blocos cifrados de tamanho
+    fixo. Exemplo:
+    with open("dados.bin", "rb") as file:
+        for block in encrypt_stream(file, key): ...'''
+    k, _size = block_sizes(key.n)
+    return _map_blocks(partial(encrypt_block, key), read_blocks(source, k), workers, batch)
+
+def decrypt_stream(source: BinaryIO | Iterable[bytes], key: PrivateKey, workers: int=1,
+                   batch: int=64) -> Iterator[bytes]:
+    '''Decifra um fluxo produzido por `encrypt_stream()`, sob demanda.'''
+    _k, size = block_sizes(key.n)
+    return _map_blocks(partial(decrypt_block, key), read_blocks(source, size), workers, batch)
+
+def encrypt_file(src: str, dst: str, key: PublicKey, workers: int=1):
+    with open(src, 'rb') as fin, open(dst, 'wb') as fout:
+        for block in encrypt_stream(fin, key, workers):
+            fout.write(block)
+
+def decrypt_file(src: str, dst: str, key: PrivateKey, workers: int=1):
+    with open(src, 'rb') as fin, open(dst, 'wb') as fout:
+        for block in decrypt_stream(fin, key, workers):
+            fout.write(block)
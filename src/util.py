@@ -18,3 +18,69 @@ class Timer:
 def error(msg:str):
     print(msg)
     exit(1)
+
+class TimeoutExceeded(TimeoutError):
+    '''Prazo de um `Deadline` esgotado. `partial` guarda o estado parcial do
+    algoritmo interrompido (relações coletadas, melhor gerador, etc.).'''
+    def __init__(self, msg:str, partial=None):
+        super().__init__(msg)
+        self.partial = partial
+
+class Cancelled(Exception):
+    '''Execução cancelada por `Deadline.cancel()` ou pelo evento associado.'''
+    def __init__(self, msg:str, partial=None):
+        super().__init__(msg)
+        self.partial = partial
+
+class Deadline:
+    '''Prazo e cancelamento cooperativos, compartilhados pelos laços dos algoritmos.
+    Os laços chamam `tick()` a cada `every` iterações, e não a cada iteração, então
+    o custo de consultar o relógio é diluído. Ao estourar o prazo, `tick()` levanta
+    TimeoutExceeded com o estado parcial; se o deadline for cancelado (ou se
+    `event.is_set()`, para cancelar a partir de outra thread ou processo), levanta
+    Cancelled. `progress(phase, done, rate)` é chamado a cada verificação, com o
+    número de iterações da fase e a taxa em iterações por segundo desde a
+    verificação anterior (para a primeira da fase, desde a última verificação de
+    qualquer fase ou, se não houver, desde a criação do deadline).
+    Exemplo:
+    deadline = Deadline(30, progress=lambda phase, done, rate: print(phase, done, rate))
+    quadratic_sieve(n, deadline=deadline)'''
+    def __init__(self, timeout:float=None, every:int=1024, progress=None, event=None):
+        self.start = time()
+        self.expires = None if timeout is None else self.start + timeout
+        self.timeout = timeout
+        self.every = every
+        self.progress = progress
+        self.event = event
+        self.cancelled = False
+        self.phases: dict[str, tuple[int, float]] = {}
+        self.last_tick = self.start
+
+    def cancel(self):
+        self.cancelled = True
+
+    def remaining(self) -> float | None:
+        if self.expires is None: return None
+        return max(0, self.expires - time())
+
+    def check(self, partial=None):
+        '''Levanta Cancelled ou TimeoutExceeded se for o caso. `partial` pode ser
+        o estado parcial ou uma função que o calcula, chamada só ao levantar.'''
+        if self.cancelled or (self.event is not None and self.event.is_set()):
+            raise Cancelled("Execução cancelada.", partial() if callable(partial) else partial)
+        if self.expires is not None and time() > self.expires:
+            raise TimeoutExceeded(f"Tempo excedido. Limite de tempo: {self.timeout}s.",
+                                  partial() if callable(partial) else partial)
+
+    def tick(self, phase:str, done:int, partial=None):
+        '''Reporta o progresso da fase `phase`, que já fez `done` iterações, e
+        verifica o prazo.'''
+        if self.progress is not None:
+            now = time()
+            last_done, last_time = self.phases.get(phase, (0, self.last_tick))
+            # Se done diminuiu, a fase recomeçou do zero.
+            delta = done - last_done if done >= last_done else done
+            self.phases[phase] = (done, now)
+            self.last_tick = now
+            self.progress(phase, done, delta / (now - last_time) if now > last_time else 0.0)
+        self.check(partial)
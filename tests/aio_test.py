@@ -0,0 +1,92 @@
+import asyncio
+import multiprocessing
+import time
+
+import pytest
+
+from src.aio import Engine
+from src.modular_arithmetic import powmod
+from src.util import TimeoutExceeded
+
+
+# 2^67 - 1 = 193707721 * 761838257287: acima do caminho para números pequenos, o
+# crivo quadrático não o fatora em tempo razoável.
+HARD = 2**67 - 1
+
+
+def test_engine_calls():
+    async def main():
+        async with Engine(workers=2) as engine:
+            return await asyncio.gather(
+                engine.quadratic_sieve(87463),
+                engine.find_generator(1019, 1018, {2: 1, 509: 1}),
+                engine.pohlig_hellman(2, powmod(2, 777, 1019), 1019, {2: 1, 509: 1}),
+                engine.generate_keys(128),
+            )
+    d, g, x, (n, e, d_) = asyncio.run(main())
+    assert 87463 % d == 0 and 1 < d < 87463
+    assert powmod(g, 509, 1019) != 1 and powmod(g, 2, 1019) != 1
+    assert powmod(2, x, 1019) == powmod(2, 777, 1019)
+    assert powmod(powmod(42, e, n), d_, n) == 42
+
+def test_engine_deduplicates():
+    async def main():
+        async with Engine(workers=1) as engine:
+            first = asyncio.create_task(engine.quadratic_sieve(87463))
+            second = asyncio.create_task(engine.quadratic_sieve(87463))
+            keys = asyncio.gather(engine.generate_keys(64), engine.generate_keys(64))
+            await asyncio.sleep(0)
+            assert engine.in_flight == 3
+            results = await asyncio.gather(first, second)
+            await keys
+            return results
+    d1, d2 = asyncio.run(main())
+    assert d1 == d2
+
+def test_engine_timeout():
+    async def main():
+        async with Engine(workers=1) as engine:
+            await engine.quadratic_sieve(HARD, timeout=0)
+    with pytest.raises(TimeoutExceeded):
+        asyncio.run(main())
+
+def test_engine_cancellation_stops_worker():
+    async def main():
+        async with Engine(workers=1) as engine:
+            task = asyncio.create_task(engine.quadratic_sieve(HARD, timeout=None))
+            await asyncio.sleep(0.5)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            # Com um único processo, o próximo job só roda se o anterior parou.
+            start = time.perf_counter()
+            d = await asyncio.wait_for(engine.quadratic_sieve(87463), 10)
+            return d, time.perf_counter() - start
+    d, elapsed = asyncio.run(main())
+    assert 87463 % d == 0 and elapsed < 10
+
+def test_engine_cancellation_keeps_shared_job():
+    async def main():
+        async with Engine(workers=1) as engine:
+            first = asyncio.create_task(engine.quadratic_sieve(87463))
+            second = asyncio.create_task(engine.quadratic_sieve(87463))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+    assert 87463 % asyncio.run(main()) == 0
+
+def test_engine_close_cancels_queued_jobs():
+    async def main():
+        engine = Engine(workers=1)
+        tasks = [asyncio.create_task(engine.quadratic_sieve(HARD + 2 * i, timeout=None)) for i in range(2)]
+        await asyncio.sleep(0.5)
+        assert len(engine._events) == 1
+        await asyncio.wait_for(engine.close(), 10)
+        assert engine._events == set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert all(isinstance(r, asyncio.CancelledError) for r in results)
+        assert engine._executor is None and engine._manager is None
+        with pytest.raises(RuntimeError):
+            await engine.quadratic_sieve(87463)
+    asyncio.run(main())
+    assert multiprocessing.active_children() == []
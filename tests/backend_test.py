@@ -0,0 +1,73 @@
+from random import Random
+
+import pytest
+
+from src import backend, base, modular_arithmetic, primality
+
+gmpy2 = pytest.importorskip('gmpy2')
+pytestmark = pytest.mark.skipif(backend.BACKEND != 'gmpy2', reason='backend gmpy2 desativado')
+
+rng = Random(42)
+NUMBERS = [rng.getrandbits(bits) for bits in (8, 32, 64, 128, 512, 2048) for _ in range(20)]
+PAIRS = list(zip(NUMBERS, reversed(NUMBERS)))
+NEGATIVE_PAIRS = [(-6, 15), (6, -15), (-4, 6), (-4, -6), (0, -5), (-5, 0)] + \
+    [(-a, b) for a, b in PAIRS[::10]] + [(a, -b) for a, b in PAIRS[5::10]]
+
+
+@pytest.mark.parametrize('a, b', PAIRS + NEGATIVE_PAIRS)
+def test_gcd(a, b):
+    result = base.gcd(a, b)
+    assert type(result) is int
+    assert result == base.gcd.python(a, b)
+
+@pytest.mark.parametrize('a, b', PAIRS + [(0, 5), (5, 0)])
+def test_gcd_extended(a, b):
+    # Os coeficientes de Bézout não são únicos: compara-se o MDC e a identidade.
+    d, x, y = base.gcd_extended(a, b)
+    assert d == base.gcd_extended.python(a, b)[0]
+    assert a * x + b * y == d
+    assert all(type(v) is int for v in (d, x, y))
+
+@pytest.mark.parametrize('a, b', NEGATIVE_PAIRS)
+def test_gcd_extended_negative(a, b):
+    assert base.gcd_extended(a, b) == base.gcd_extended.python(a, b)
+
+@pytest.mark.parametrize('n', NUMBERS)
+def test_roots(n):
+    assert base.isqrt(n) == base.isqrt.python(n)
+    assert base.iroot(n, 3) == base.iroot.python(n, 3)
+    assert type(base.isqrt(n)) is int
+
+@pytest.mark.parametrize('a, n', PAIRS + [(2, 4), (3, 1), (3, -7), (-3, 7), (-12345, 1000003)])
+def test_invmod(a, n):
+    assert modular_arithmetic.invmod(a, n) == modular_arithmetic.invmod.python(a, n)
+
+@pytest.mark.parametrize('b, n', PAIRS + [(-b, n) for b, n in PAIRS[::10]])
+@pytest.mark.parametrize('e', [0, 1, 65537, -3])
+def test_powmod(b, e, n):
+    if n < 2: return
+    result = modular_arithmetic.powmod(b, e, n)
+    assert type(result) is int
+    assert result == modular_arithmetic.powmod.python(b, e, n)
+
+@pytest.mark.parametrize('b, n', PAIRS[::5])
+def test_powmod_context(b, n):
+    if n < 2: return
+    for e in (0, 1, 3, 65537, (n >> 1) | 1):
+        assert modular_arithmetic.PowmodContext(e, n)(b) == pow(b, e, n)
+
+@pytest.mark.parametrize('n', [1000003, 2**127 - 1, 2**521 - 1])
+def test_multi_powmod(n):
+    pairs = [(a % n, b) for a, b in PAIRS[::7]] + [(2, -5), (-3, 7)]
+    expected = 1
+    for b, e in pairs:
+        expected = expected * pow(b, e, n) % n
+    assert modular_arithmetic.multi_powmod(pairs, n) == expected
+
+@pytest.mark.parametrize('a, n', [(a, n | 1) for a, n in PAIRS] + [(-a, n | 1) for a, n in PAIRS[::10]])
+def test_jacobi(a, n):
+    assert modular_arithmetic.jacobi(a, n) == modular_arithmetic.jacobi.python(a, n)
+
+@pytest.mark.parametrize('n', [0, 1, 2, 561, 1105, 7919, 2**61 - 1, 2**89 - 1, 2**64 + 1] + NUMBERS)
+def test_prime_miller_rabin(n):
+    assert primality.prime_miller_rabin(n) == primality.prime_miller_rabin.python(n)
@@ -14,11 +14,56 @@ from tests.big_numbers import extgcd
     [7, 2],
     [8, 2],
     [9, 3],
-    [101, 10]
+    [101, 10],
+    [0, 0],
+    [10**40, 10**20],
+    [10**40 - 1, 10**20 - 1]
 ])
 def test_isqrt(n, r):
     assert base.isqrt(n) == r
 
+@pytest.mark.parametrize("n,k,r", [
+    [1000, 3, 10],
+    [999, 3, 9],
+    [2**64, 4, 2**16],
+    [7**33 + 1, 11, 343],
+    [5, 1, 5]
+])
+def test_iroot(n, k, r):
+    assert base.iroot(n, k) == r
+
+@pytest.mark.parametrize("n,r", [
+    [1, 0],
+    [9, 0],
+    [10, 1],
+    [1031, 3],
+    [10**45 - 1, 44],
+    [10**45, 45],
+    [2**13301, 4003]
+])
+def test_ilog10(n, r):
+    assert base.ilog10(n) == r
+
+def test_ilog10_powers():
+    for k in range(1, 2000, 7):
+        assert base.ilog10(10**k - 1) == k - 1
+        assert base.ilog10(10**k) == k
+        assert base.ilog10(2**k) == len(str(2**k)) - 1
+
+@pytest.mark.parametrize("n,r,k", [
+    [7776, 6, 5],
+    [64, 2, 6],
+    [12657973**3, 12657973, 3],
+    [100, 10, 2],
+    [101, 101, 1],
+    [2**210, 2, 210],
+    [6**12 * 5**12, 30, 12],
+    [3, 3, 1]
+])
+def test_perfect_power(n, r, k):
+    assert base.perfect_power(n) == (r, k)
+    assert base.is_perfect_power(n) == (k > 1)
+
 @pytest.mark.parametrize("n,s,t", [
     [2, 1, 1],
     [3, 0, 3],
@@ -32,6 +77,26 @@ def test_oddify(n, s, t):
 def test_gcd_extended(a, b, x, y, d):
     assert base.gcd_extended(a, b) == (d, x, y)
 
+def test_gcd_extended_deep():
+    # Fibonacci consecutivos são o pior caso de Euclides: ~3000 divisões.
+    a, b = 0, 1
+    for _ in range(3000):
+        a, b = b, a + b
+    d, x, y = base.gcd_extended.python(a, b)
+    assert d == 1 and a * x + b * y == 1
+
 def test_poly():
     p = base.poly(1, 2, 3)
     assert p(2) == 11
+
+def test_product_tree():
+    assert base.product_tree([2, 3, 5]) == [[2, 3, 5], [6, 5], [30]]
+    assert base.product_tree([7]) == [[7]]
+
+@pytest.mark.parametrize("x,nums", [
+    [47, [2, 3, 5]],
+    [10**50 + 3, [7, 11, 13, 17, 19, 23, 29]],
+    [0, [4, 9]]
+])
+def test_remainder_tree(x, nums):
+    assert base.remainder_tree(x, base.product_tree(nums)) == [x % n for n in nums]
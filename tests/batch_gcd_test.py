@@ -0,0 +1,38 @@
+import pytest
+
+from src import batch_gcd
+from src.rsa import random_prime
+
+
+@pytest.mark.parametrize("moduli", [
+    [15, 21, 77],
+    [15],
+    [35, 143, 323, 35],
+    [6, 35, 143, 221, 10, 323, 91]
+])
+def test_batch_gcd(moduli):
+    expected = []
+    for i, n in enumerate(moduli):
+        others = 1
+        for j, m in enumerate(moduli):
+            if j != i: others *= m
+        expected.append(batch_gcd.gcd(n, others))
+    assert batch_gcd.batch_gcd(moduli) == expected
+
+def test_batch_gcd_file(tmp_path):
+    primes = [random_prime(64) for _ in range(12)]
+    moduli = [primes[2 * i] * primes[2 * i + 1] for i in range(6)]
+    moduli.append(primes[0] * random_prime(64))
+    path = tmp_path / "moduli.txt"
+    path.write_text("# chaves\n" + "\n".join(hex(n) if i % 2 else str(n) for i, n in enumerate(moduli)) + "\n\n")
+    found = list(batch_gcd.batch_gcd_file(path, tmp_path))
+    assert [(i, n) for i, n, _d in found] == [(0, moduli[0]), (6, moduli[6])]
+    assert all(d == primes[0] for _i, _n, d in found)
+    assert [d for d in batch_gcd.batch_gcd(moduli) if d != 1] == [d for _i, _n, d in found]
+
+@pytest.mark.parametrize("moduli", [[15], [15, 21], [15, 21, 77], [6, 35, 143, 221, 10, 323, 91]])
+def test_batch_gcd_file_sizes(tmp_path, moduli):
+    path = tmp_path / "moduli.txt"
+    path.write_text("\n".join(map(str, moduli)))
+    expected = [(i, n, d) for i, (n, d) in enumerate(zip(moduli, batch_gcd.batch_gcd(moduli))) if d != 1]
+    assert list(batch_gcd.batch_gcd_file(path, tmp_path)) == expected
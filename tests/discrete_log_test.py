@@ -1,6 +1,10 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
 import pytest
 
 from src import discrete_log
+from src.util import Cancelled, Deadline
 from tests.big_numbers import bsgs
 
 
@@ -20,3 +24,133 @@ def test_pohlig_hellman():
 def test_pohlig_hellman_prime_power():
     g, h, p, e, o = 27, 40, 2, 3, 41
     assert discrete_log.pohlig_hellman_prime_power_order(g, h, p, e, o) == 4
+
+@pytest.mark.parametrize("g,n,order", [
+    [7, 41, 40],
+    [2, 9, 6],
+    [4, 1000003, 500001]
+])
+def test_discrete_logs(g, n, order):
+    xs = [0, 1, order // 3, order - 1]
+    H = [pow(g, x, n) for x in xs]
+    assert discrete_log.discrete_logs(g, H, n, order) == xs
+    assert discrete_log.baby_step_table(g, n, order) is discrete_log.baby_step_table(g, n, order)
+
+def test_baby_step_table_cache_slots(monkeypatch):
+    monkeypatch.setattr(discrete_log, '_tables', {})
+    monkeypatch.setattr(discrete_log, 'BSGS_CACHE_SLOTS', 2048)
+    small = discrete_log.baby_step_table(7, 41, 40)
+    large = discrete_log.baby_step_table(4, 1000003, 500001)
+    assert len(large.keys) == 2048
+    assert list(discrete_log._tables.values()) == [large]
+    again = discrete_log.baby_step_table(7, 41, 40)
+    assert again is not small
+    assert list(discrete_log._tables.values()) == [again]
+
+def test_baby_step_giant_step_not_in_subgroup():
+    with pytest.raises(ValueError):
+        discrete_log.baby_step_giant_step(4, 3, 7, 3)
+
+@pytest.mark.parametrize("x", [0, 1, 3, 123456789, 500000002])
+def test_pollard_rho_log(x):
+    g, n, order = 4, 1000000007, 500000003
+    h = discrete_log.powmod(g, x, n)
+    assert discrete_log.pollard_rho_log(g, h, n, order) == x
+
+@pytest.mark.parametrize("x", [1, 2, 500000003, 987654321])
+def test_pollard_rho_log_composite_order(x):
+    g, n, order = 5, 1000000007, 1000000006
+    assert discrete_log.pollard_rho_log(g, discrete_log.powmod(g, x, n), n, order) == x
+
+def test_pollard_rho_log_not_in_subgroup():
+    with pytest.raises(ValueError):
+        discrete_log.pollard_rho_log(4, 5, 1000000007, 500000003, timeout=3)
+    with pytest.raises(ValueError):
+        discrete_log.parallel_pollard_rho_log(4, 5, 1000000007, 500000003, workers=2, timeout=3)
+
+@pytest.mark.parametrize("g,x,h,p", bsgs)
+def test_pollard_rho_log_big_numbers(g, x, h, p):
+    x = discrete_log.pollard_rho_log(g, h, p, p - 1)
+    assert discrete_log.powmod(g, x, p) == h
+
+@pytest.mark.parametrize("g,n,a,b,x", [
+    [7, 41, 0, 39, 14],
+    [5, 1000000007, 10**6, 2 * 10**6, 1234567],
+    [5, 1000000007, 10**8, 10**8, 10**8]
+])
+def test_pollard_kangaroo(g, n, a, b, x):
+    h = discrete_log.powmod(g, x, n)
+    assert discrete_log.pollard_kangaroo(g, h, n, a, b) == x
+
+def test_pohlig_hellman_rho():
+    n = 101
+    f = {2: 2, 5: 2}
+    g, h = 15, 100
+    assert discrete_log.pohlig_hellman(g, h, n, f, memory_limit=0) == 50
+
+@pytest.mark.parametrize("x", [0, 7, 123456789])
+def test_parallel_pollard_rho_log(x):
+    g, n, order = 4, 1000000007, 500000003
+    h = discrete_log.powmod(g, x, n)
+    assert discrete_log.parallel_pollard_rho_log(g, h, n, order, workers=2) == x
+
+@pytest.mark.parametrize("memory_limit", [0, discrete_log.BSGS_MEMORY_LIMIT])
+def test_pohlig_hellman_parallel(memory_limit):
+    n = 1000000007
+    f = {2: 1, 500000003: 1}
+    g, x = 5, 987654321
+    h = discrete_log.powmod(g, x, n)
+    y = discrete_log.pohlig_hellman(g, h, n, f, memory_limit=memory_limit, workers=2)
+    assert discrete_log.powmod(g, y, n) == h
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_pohlig_hellman_index_calculus(workers):
+    n = 1000000007
+    f = {2: 1, 500000003: 1}
+    g, x = 5, 123456789
+    h = discrete_log.powmod(g, x, n)
+    assert discrete_log.pohlig_hellman(g, h, n, f, workers=workers, index_calculus_limit=1000) == x
+
+def test_pollard_rho_log_cancelled():
+    deadline = Deadline(every=1)
+    deadline.cancel()
+    with pytest.raises(Cancelled):
+        discrete_log.pollard_rho_log(4, 64, 1000000007, 500000003, deadline=deadline)
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_pohlig_hellman_cancelled(workers):
+    n = 1000000007
+    f = {2: 1, 500000003: 1}
+    h = discrete_log.powmod(5, 987654321, n)
+    deadline = Deadline(every=1)
+    deadline.cancel()
+    with pytest.raises(Cancelled):
+        discrete_log.pohlig_hellman(5, h, n, f, workers=workers, deadline=deadline)
+
+def test_pohlig_hellman_parallel_shared_event():
+    n = 1000000007
+    f = {2: 1, 500000003: 1}
+    h = discrete_log.powmod(5, 987654321, n)
+    with multiprocessing.Manager() as manager:
+        event = manager.Event()
+        event.set()
+        with pytest.raises(Cancelled):
+            discrete_log.pohlig_hellman(5, h, n, f, workers=2, deadline=Deadline(event=event))
+
+def test_pohlig_hellman_reuses_executor():
+    n = 1000000007
+    f = {2: 1, 500000003: 1}
+    h = discrete_log.powmod(5, 123456789, n)
+    for _ in range(2):
+        y = discrete_log.pohlig_hellman(5, h, n, f, workers=2, index_calculus_limit=1000)
+        assert discrete_log.powmod(5, y, n) == h
+    assert discrete_log.shared_executor(2) is discrete_log._executors[2]
+    assert len(discrete_log._executors) == 1
+
+def test_pohlig_hellman_external_executor():
+    n = 1000000007
+    f = {2: 1, 500000003: 1}
+    h = discrete_log.powmod(5, 987654321, n)
+    with ProcessPoolExecutor(2) as pool:
+        y = discrete_log.pohlig_hellman(5, h, n, f, executor=pool)
+        assert discrete_log.powmod(5, y, n) == h
@@ -20,7 +20,9 @@ def test_pollard_rho(n):
     [12, None, {2: 2, 3: 1}],
     [717967279050961, None, {12657973: 1, 56720557: 1}],
     [100, None, {2: 2, 5: 2}],
-    [15, [2, 3, 5], {3: 1, 5: 1}]
+    [15, [2, 3, 5], {3: 1, 5: 1}],
+    [12657973**2 * 56720557**2, None, {12657973: 2, 56720557: 2}],
+    [56720557**3, None, {56720557: 3}]
 ])
 def test_factors(n, primes, f):
     assert factorization.pollard_rho_prime_power_decomposition(n, primes) == f
@@ -39,3 +41,43 @@ def test_factor_out(n, p, u, alpha):
 ])
 def test_factor_with_limited_primes(n, primes, powers, u):
     assert factorization.factor_with_limited_primes(n, primes) == (powers, u)
+
+SMALL_COMPOSITES = [4, 6, 2041, 11111, 850903, 10201030027, 717967279050961, 4294967291 * 4294967279,
+                    2**61 - 1 + 2**62]
+
+def is_factor(d, n):
+    return d is not None and 1 < d < n and n % d == 0
+
+@pytest.mark.parametrize('n', [2041, 11111, 850903, 10201030027, 717967279050961])
+@pytest.mark.parametrize('method', [factorization.hart_one_line, factorization.lehman, factorization.squfof])
+def test_small_methods(method, n):
+    d = method(n)
+    assert d is None or is_factor(d, n)
+
+@pytest.mark.parametrize('n', [2041, 11111, 850903, 10201030027, 717967279050961])
+def test_lehman_always_finds_factor(n):
+    assert is_factor(factorization.lehman(n), n)
+
+@pytest.mark.parametrize('n', SMALL_COMPOSITES)
+def test_factor_small(n):
+    assert is_factor(factorization.factor_small(n), n)
+
+@pytest.mark.parametrize('n', [1, 7919, 2**61 - 1, 2**64 + 1])
+def test_factor_small_rejects(n):
+    with pytest.raises(ValueError):
+        factorization.factor_small(n)
+
+def test_factor_small_batch(monkeypatch):
+    numbers = SMALL_COMPOSITES + [1, 2, 7919, 2**61 - 1]
+    expected_none = [False] * len(SMALL_COMPOSITES) + [True] * 4
+    results = [factorization.factor_small_batch(numbers)]
+    monkeypatch.setattr(factorization, 'np', None)
+    results.append(factorization.factor_small_batch(numbers))
+    for factors in results:
+        for n, d, none in zip(numbers, factors, expected_none):
+            assert d is None if none else is_factor(d, n)
+
+def test_factor_small_batch_vectorized():
+    pytest.importorskip('numpy')
+    numbers = [p * q for p in (1009, 65521, 1048573) for q in (1013, 65537, 1048583)]
+    assert all(is_factor(d, n) for n, d in zip(numbers, factorization.factor_small_batch(numbers)))
@@ -0,0 +1,23 @@
+import pytest
+
+from src import index_calculus
+from src.modular_arithmetic import powmod
+
+
+@pytest.mark.parametrize("g,p,q", [
+    [5, 1000000007, 500000003],
+    [2, 2000000000123, 1000000000061]
+])
+def test_index_calculus_log(g, p, q):
+    for x in [0, 1, 12345, q - 1, 10**9 + 7]:
+        h = powmod(g, x, p)
+        assert index_calculus.index_calculus_log(g, h, p, q) == x % q
+    context = index_calculus.index_calculus_context(g, p, q)
+    for prime, log in context.logs.items():
+        assert powmod(g, log * (p - 1) // q, p) == powmod(prime, (p - 1) // q, p)
+
+def test_index_calculus_invalid_order():
+    with pytest.raises(ValueError):
+        index_calculus.IndexCalculus(4, 1000000007, 2)
+    with pytest.raises(ValueError):
+        index_calculus.IndexCalculus(5, 1000000007, 7)
@@ -85,3 +85,13 @@ def test_naive_vector_prod():
 ])
 def test_rref(A, A_reduced):
     assert linalg.rref(A) == A_reduced
+
+def test_solve_mod_prime():
+    rows = [{0: 1, 1: 1}, {0: 2, 1: 2}, {1: 3, 2: 1}, {0: 1, 2: 5}]
+    rhs = [3, 6, 2, 4]
+    x = linalg.solve_mod_prime(rows, rhs, 3, 7)
+    for row, b in zip(rows, rhs):
+        assert sum(c * x[j] for j, c in row.items()) % 7 == b % 7
+
+def test_solve_mod_prime_rank_deficient():
+    assert linalg.solve_mod_prime([{0: 1, 1: 1}, {0: 3, 1: 3}], [1, 3], 2, 11) is None
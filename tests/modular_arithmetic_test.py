@@ -1,7 +1,7 @@
 import pytest
 import sympy
 
-from src import modular_arithmetic
+from src import modular_arithmetic, util
 from tests.big_numbers import modular_inverse, fastexp
 
 @pytest.mark.parametrize("n,p,sq", [
@@ -46,6 +46,10 @@ def test_powmod_negative_exponent(b, e, n, x):
 def test_invmod(a, n, inv):
     assert modular_arithmetic.invmod(a, n) == inv
 
+@pytest.mark.parametrize("a,n,inv", [[-3, 7, 2], [-12345, 1000003, 224140], [-4, 6, 0]])
+def test_invmod_negative(a, n, inv):
+    assert modular_arithmetic.invmod(a, n) == inv
+
 
 @pytest.mark.parametrize("n", [11, 13, 17, 19, 101])
 def test_find_generator(n):
@@ -91,3 +95,100 @@ def test_is_generator(b, n, phi, F, expected):
 ])
 def test_order(g, n, phi, F, o):
     assert modular_arithmetic.order(g, n, phi, F) == o
+
+@pytest.mark.parametrize("pairs,n", [
+    [[(2, 5), (3, 2)], 7],
+    [[(15, -3), (100, 1)], 101],
+    [[(b, e) for b, e in zip(range(2, 13), range(100, 1200, 100))], 1009],
+    [[(7, 0), (11, 0)], 13],
+    [[(-1, 3), (2, 3)], 1000003]
+])
+def test_multi_powmod(pairs, n):
+    expected = 1
+    for b, e in pairs:
+        expected = expected * modular_arithmetic.powmod(b, e, n) % n
+    assert modular_arithmetic.multi_powmod(pairs, n) == expected
+
+@pytest.mark.parametrize("n", [3, 7, 15, 21, 45, 101, 1001])
+def test_jacobi(n):
+    for a in range(-n, 2 * n):
+        assert modular_arithmetic.jacobi(a, n) == sympy.jacobi_symbol(a, n)
+
+def test_legendre_symbols():
+    primes = list(sympy.primerange(3, 2000))
+    for a in [13, 10**40 + 1, 3**20000 + 2]:
+        symbols = modular_arithmetic.legendre_symbols(a, primes)
+        assert symbols == [sympy.legendre_symbol(a % p, p) for p in primes]
+
+def test_residues():
+    primes = list(sympy.primerange(2, 2000))
+    for a in [100, 3**20000 + 2]:
+        assert modular_arithmetic.residues(a, primes) == [a % p for p in primes]
+
+def test_crt():
+    crt = modular_arithmetic.CRT([4, 9, 25, 49])
+    vectors = [[3, 8, 24, 48], [0, 0, 0, 0], [-1, 10, 7, 1], [1, 2, 3, 4]]
+    xs = crt.solve_many(vectors)
+    for x, r in zip(xs, vectors):
+        assert 0 <= x < 4 * 9 * 25 * 49
+        for a, m in zip(r, crt.moduli):
+            assert x % m == a % m
+
+def test_crt_digits():
+    crt = modular_arithmetic.CRT([3, 5, 7, 11])
+    vectors = [[2, 3, 2, 1], [0, 4, 6, 10], [1, 1, 1, 1]]
+    for v, x in zip(crt.digits_many(vectors), crt.solve_many(vectors)):
+        assert all(0 <= d < m for d, m in zip(v, crt.moduli))
+        assert v[0] + 3 * (v[1] + 5 * (v[2] + 7 * v[3])) == x
+    assert [crt.solve(A) for A in vectors] == crt.solve_many(vectors)
+    with pytest.raises(ValueError):
+        crt.solve_many([[1, 2, 3, 4], [1, 2, 3]])
+
+def test_crt_not_coprime():
+    with pytest.raises(ValueError):
+        modular_arithmetic.CRT([6, 9])
+
+@pytest.mark.parametrize("n,phi", [
+    [409, 408],
+    [1000003, 1000002],
+    [49, 42]
+])
+def test_find_generator_cached(n, phi):
+    f = sympy.factorint(phi)
+    g = modular_arithmetic.find_generator(n, phi, f)
+    assert modular_arithmetic.is_generator(g, n, phi, f)
+    assert modular_arithmetic.order(g, n, phi, f) == phi
+    assert modular_arithmetic._generators[n, phi] == g
+    assert modular_arithmetic.find_generator(n, phi, f) == g
+
+def test_find_generator_cache_bounded(monkeypatch):
+    monkeypatch.setattr(modular_arithmetic, '_generators', {})
+    primes = list(sympy.primerange(3, 2000))[:130]
+    for p in primes:
+        modular_arithmetic.find_generator(p, p - 1, sympy.factorint(p - 1))
+    assert len(modular_arithmetic._generators) == 128
+    assert (primes[0], primes[0] - 1) not in modular_arithmetic._generators
+    assert (primes[-1], primes[-1] - 1) in modular_arithmetic._generators
+
+@pytest.mark.parametrize("e,n", [
+    [0, 7],
+    [1, 7],
+    [65537, 10**40 + 3],
+    [2**300 - 1, 2**521 - 1],
+    [3**200, 10**60 + 7]
+])
+def test_powmod_context(e, n):
+    context = modular_arithmetic.PowmodContext(e, n)
+    for b in [0, 1, 2, -5, 10**50 + 11]:
+        assert context(b) == modular_arithmetic.powmod(b, e, n)
+
+def test_find_generator_timeout():
+    n = 1000000007
+    deadline = util.Deadline(0, every=1)
+    with pytest.raises(util.TimeoutExceeded) as info:
+        modular_arithmetic.find_generator(n, n - 1, {2: 1, 500000003: 1}, deadline=deadline)
+    assert info.value.partial == {'generator': 1, 'order': 1}
+
+def test_find_generator_not_cyclic():
+    with pytest.raises(ValueError):
+        modular_arithmetic.find_generator(15, 8, {2: 3})
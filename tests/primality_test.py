@@ -30,3 +30,15 @@ def test_primes_miller_rabin(p, result):
 ])
 def test_miller_rabin_small(n, result):
     assert primality.prime_miller_rabin(n) == result
+
+@pytest.mark.parametrize("n,b", [[15, 5], [25, 5], [35, 7], [200350032435, 5]])
+def test_miller_test_shared_factor(n, b):
+    k, q = primality.oddify(n - 1)
+    assert not primality.miller_test(n, b, k, q)
+
+def test_miller_rabin_multiples_of_5(monkeypatch):
+    start = 200350032435
+    assert not any(primality.prime_miller_rabin.python(n) for n in range(start, start + 5 * 2000, 5))
+    # Uma base que divide n nunca deve ser tomada como testemunha de primalidade.
+    monkeypatch.setattr(primality, 'randint', lambda a, b: 5)
+    assert not primality.prime_miller_rabin.python(start, rep=1)
@@ -1,8 +1,11 @@
+import io
+import json
 from collections import defaultdict
 
 import pytest
 
 from src import quadratic_sieve as qs
+from src.util import Deadline, TimeoutExceeded
 
 @pytest.mark.parametrize('ker,solutions',[
     [[[1,0,0], [0,1,0]], [[0,0,0], [0,1,0], [1,0,0], [1,1,0]]]
@@ -69,3 +72,51 @@ def test_quadratic_sieve(n):
     d = qs.quadratic_sieve(n)
     assert d not in (1, n)
     assert n % d == 0
+
+@pytest.mark.parametrize('n', [10, 50, 33, 100, 973, 1817, 2951, 8051, 87463])
+def test_quadratic_sieve_without_small_path(n):
+    d = qs.quadratic_sieve(n, small_limit=0)
+    assert d not in (1, n)
+    assert n % d == 0
+
+def test_compose_mod_n():
+    assert qs.compose({2: 3, 5: 1}, 7) == 40 % 7
+    assert qs.compose({-1: 1, 2: 3}, 11) == -8 % 11
+
+@pytest.mark.parametrize('n,r', [
+    [12657973**3, 12657973],
+    [2**40, 2]
+])
+def test_quadratic_sieve_perfect_power(n, r):
+    assert qs.quadratic_sieve(n) == r
+
+def test_quadratic_sieve_timeout():
+    deadline = Deadline(0, every=1)
+    with pytest.raises(TimeoutExceeded) as info:
+        qs.quadratic_sieve(717967279050961, deadline=deadline, small_limit=0)
+    assert 'relations' in info.value.partial
+
+def test_quadratic_sieve_stats():
+    stats = qs.SieveStats()
+    output = io.StringIO()
+    d = qs.quadratic_sieve(87463, stats=stats, emit=output, small_limit=0)
+    assert stats.status == 'ok' and stats.factor == d
+    assert stats.method == 'quadratic_sieve'
+    assert (stats.B, stats.factor_base_size) == (43, 9)
+    assert stats.candidates > 0 and 0 < stats.smooth_yield <= 1
+    assert set(stats.phases) <= {'setup', 'relations', 'linear_algebra', 'square_root'}
+    assert json.loads(output.getvalue()) == json.loads(json.dumps(stats.to_dict()))
+
+def test_quadratic_sieve_stats_on_failure():
+    output = io.StringIO()
+    with pytest.raises(TimeoutExceeded):
+        qs.quadratic_sieve(717967279050961, deadline=Deadline(0, every=1), emit=output, small_limit=0)
+    record = json.loads(output.getvalue())
+    assert record['status'] == 'TimeoutExceeded'
+    assert record['candidates'] == 1
+
+def test_quadratic_sieve_small_path():
+    stats = qs.SieveStats()
+    d = qs.quadratic_sieve(717967279050961, stats=stats)
+    assert 1 < d < 717967279050961 and 717967279050961 % d == 0
+    assert stats.method == 'factor_small' and set(stats.phases) == {'small'}
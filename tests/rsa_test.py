@@ -0,0 +1,56 @@
+import pytest
+
+from src import rsa
+
+
+@pytest.mark.parametrize("bits", [32, 64, 256])
+def test_private_key(bits):
+    key = rsa.generate_private_key(bits)
+    assert key.e == rsa.PUBLIC_EXPONENT
+    assert key.n == key.p * key.q
+    assert key.qInv * key.q % key.p == 1
+    public = key.public_key()
+    for M in [0, 1, 2, 12345, key.n - 1]:
+        C = public.encrypt(M)
+        assert C == pow(M, key.e, key.n)
+        assert key.decrypt(C) == M
+
+def test_generate_keys():
+    n, e, f = rsa.generate_keys(64)
+    M = 42
+    assert rsa.decode(rsa.encode(M, e, n), f, n) == M
+
+@pytest.mark.parametrize("bits", [4, 8, 16])
+def test_generate_keys_small(bits):
+    n, e, f = rsa.generate_keys(bits)
+    assert e == 3
+    for M in range(min(n, 50)):
+        assert rsa.decode(rsa.encode(M, e, n), f, n) == M
+
+def test_generate_private_key_too_small():
+    with pytest.raises(ValueError):
+        rsa.generate_private_key(16, rsa.PUBLIC_EXPONENT)
+    with pytest.raises(ValueError):
+        rsa.generate_private_key(2)
+
+def test_private_key_invalid_exponent():
+    with pytest.raises(ValueError):
+        rsa.PrivateKey(11, 13, 5)
+
+@pytest.mark.parametrize("data", [b"", b"\x00", b"\x00\x00abc", bytes(range(256)) * 5])
+def test_stream_roundtrip(data):
+    key = rsa.generate_private_key(128)
+    k, size = rsa.block_sizes(key.n)
+    pieces = [data[i:i + 7] for i in range(0, len(data), 7)]
+    blocks = list(rsa.encrypt_stream(pieces, key.public_key()))
+    assert len(blocks) == -(-len(data) // k)
+    assert all(len(block) == size for block in blocks)
+    assert b"".join(rsa.decrypt_stream(blocks, key)) == data
+
+def test_file_roundtrip_parallel(tmp_path):
+    key = rsa.generate_private_key(128)
+    data = bytes(range(256)) * 40
+    (tmp_path / "plain.bin").write_bytes(data)
+    rsa.encrypt_file(tmp_path / "plain.bin", tmp_path / "cipher.bin", key.public_key(), workers=2)
+    rsa.decrypt_file(tmp_path / "cipher.bin", tmp_path / "out.bin", key, workers=2)
+    assert (tmp_path / "out.bin").read_bytes() == data
@@ -0,0 +1,45 @@
+import io
+import json
+
+import tp2
+
+
+def test_factor_job():
+    result = tp2.factor_job(1, 87463, 15)
+    assert result['status'] == 'ok'
+    assert result['method'] == 'factor_small'
+    assert 87463 % result['factor'] == 0 and 1 < result['factor'] < 87463
+
+def test_factor_job_statuses():
+    assert tp2.factor_job(1, 1, 15)['status'] == 'invalid'
+    assert tp2.factor_job(1, 1009, 15)['status'] == 'prime'
+    result = tp2.factor_job(1, 1009**3, 15)
+    assert result['method'] == 'perfect_power' and result['factor'] == 1009
+
+def test_factor_job_timeout():
+    result = tp2.factor_job(1, 2**67 - 1, 0)
+    assert result['status'] == 'timeout'
+    assert result['factor'] is None
+    assert result['method'] == 'quadratic_sieve'
+
+def test_batch():
+    source = io.StringIO("87463\n# comentário\n\nabc\n1009\n")
+    output = io.StringIO()
+    tp2.batch(source, output, 2, 15)
+    results = {r['line']: r for r in map(json.loads, output.getvalue().splitlines())}
+    assert results.keys() == {1, 4, 5}
+    assert results[1]['status'] == 'ok'
+    assert results[4]['status'] == 'invalid'
+    assert results[4].keys() == results[1].keys()
+    assert results[5]['status'] == 'prime'
+
+def test_batch_streams_output():
+    output = io.StringIO()
+    def source():
+        for n in (87463, 8051, 1817):
+            yield f"{n}\n"
+        # Com um processo, no máximo dois números ficam em andamento.
+        assert output.getvalue()
+        yield "2951\n"
+    tp2.batch(source(), output, 1, 15)
+    assert len(output.getvalue().splitlines()) == 4
@@ -0,0 +1,49 @@
+import threading
+
+import pytest
+
+from src import util
+
+
+def test_deadline_timeout():
+    deadline = util.Deadline(0)
+    with pytest.raises(util.TimeoutExceeded) as info:
+        deadline.tick('phase', 10, lambda: {'state': 1})
+    assert info.value.partial == {'state': 1}
+
+def test_deadline_without_timeout():
+    deadline = util.Deadline()
+    deadline.check()
+    assert deadline.remaining() is None
+
+def test_deadline_cancel():
+    deadline = util.Deadline(60)
+    deadline.cancel()
+    with pytest.raises(util.Cancelled):
+        deadline.check(5)
+
+def test_deadline_event():
+    event = threading.Event()
+    deadline = util.Deadline(60, event=event)
+    deadline.check()
+    event.set()
+    with pytest.raises(util.Cancelled):
+        deadline.check()
+
+def test_deadline_progress():
+    calls = []
+    deadline = util.Deadline(60, progress=lambda *args: calls.append(args))
+    deadline.tick('relations', 1024)
+    deadline.tick('relations', 2048)
+    assert [(phase, done) for phase, done, _rate in calls] == [('relations', 1024), ('relations', 2048)]
+    assert all(rate >= 0 for _phase, _done, rate in calls)
+
+def test_deadline_progress_rate(monkeypatch):
+    clock = iter([100.0, 101.0, 103.0, 104.0])
+    monkeypatch.setattr(util, 'time', lambda: next(clock))
+    calls = []
+    deadline = util.Deadline(progress=lambda *args: calls.append(args))
+    deadline.tick('relations', 1024)
+    deadline.tick('relations', 2048)
+    deadline.tick('square_root', 512)
+    assert calls == [('relations', 1024, 1024.0), ('relations', 2048, 512.0), ('square_root', 512, 512.0)]
@@ -1,12 +1,119 @@
-from src.quadratic_sieve import quadratic_sieve, find_B
-from src.util import Timer
+'''Fatora inteiros com o crivo quadrático.
 
-n = (int(input("Insira o valor de N: ")))
+Sem argumentos, lê um único N da entrada padrão e imprime um fator. Com --batch,
+lê vários N (um por linha) de um arquivo ou da entrada padrão ("-"), fatora-os em
+paralelo num pool de processos, cada um com seu próprio prazo, e escreve um
+resultado JSON por linha, na ordem em que terminam. A leitura acompanha a escrita:
+no máximo dois números por processo ficam em andamento, então os primeiros
+resultados saem antes de a entrada acabar:
 
-print()
+    python tp2.py --batch numeros.txt --workers 4 --timeout 30
+    {"line": 2, "n": 87463, "factor": 149, "time": 0.004, "method": "factor_small", "status": "ok"}
 
-with Timer():
-    B = find_B(n)
-    print(f"Executando crivo quadrático com primos menores ou iguais a B={B}")
-    d = quadratic_sieve(n)
-    print("Fator encontrado para n: ", d)
+Um número difícil termina com status "timeout" ou "error" sem interromper os demais.'''
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from time import perf_counter
+
+from src.primality import prime_miller_rabin
+from src.quadratic_sieve import quadratic_sieve, find_B, SieveStats
+from src.util import Timer, TimeoutExceeded
+
+
+def empty_result(line: int, n: int | str) -> dict:
+    '''Resultado com todos os campos do relatório, ainda sem fator nem status.'''
+    return {'line': line, 'n': n, 'factor': None, 'time': 0.0, 'method': None, 'status': None}
+
+def factor_job(line: int, n: int, timeout: float) -> dict:
+    '''Fatora n com prazo `timeout` e retorna o resultado como dicionário. Nunca
+    levanta exceções: falhas são reportadas no campo status.'''
+    result = empty_result(line, n)
+    stats = SieveStats()
+    start = perf_counter()
+    try:
+        if n < 4:
+            result['status'] = 'invalid'
+            return result
+        if prime_miller_rabin(n):
+            result['status'] = 'prime'
+            return result
+        result['factor'] = quadratic_sieve(n, timeout=timeout, stats=stats)
+        result['status'] = 'ok'
+    except TimeoutExceeded:
+        result['status'] = 'timeout'
+    except Exception as e:		# pylint: disable=broad-except
+        result['status'] = 'error'
+        result['error'] = repr(e)
+    finally:
+        result['method'] = stats.method
+        result['time'] = perf_counter() - start
+    return result
+
+def read_numbers(file):
+    '''Gera pares (linha, texto) das linhas não vazias de `file`, ignorando
+    comentários iniciados por #.'''
+    for i, line in enumerate(file, 1):
+        line = line.split('#', 1)[0].strip()
+        if line: yield i, line
+
+def batch(file, output, workers: int, timeout: float):
+    workers = workers or os.cpu_count() or 1
+    def write(result: dict):
+        output.write(json.dumps(result) + '\n')
+        output.flush()
+    with ProcessPoolExecutor(workers) as pool:
+        pending = set()
+        for line, text in read_numbers(file):
+            try:
+                n = int(text)
+            except ValueError:
+                result = empty_result(line, text)
+                result['status'] = 'invalid'
+                write(result)
+                continue
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done: write(future.result())
+            pending.add(pool.submit(factor_job, line, n, timeout))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done: write(future.result())
+
+def interactive():
+    n = (int(input("Insira o valor de N: ")))
+
+    print()
+
+    with Timer():
+        B = find_B(n)
+        print(f"Executando crivo quadrático com primos menores ou iguais a B={B}")
+        try:
+            d = quadratic_sieve(n)
+            print("Fator encontrado para n: ", d)
+        except TimeoutExceeded as e:
+            print("Tempo limite excedido. Não foi possível fatorar n.")
+            print("Relações B-smooth encontradas:", len(e.partial['relations']))
+
+def main(argv: list[str]=None):
+    parser = argparse.ArgumentParser(description="Fatoração de inteiros com o crivo quadrático.")
+    parser.add_argument('--batch', metavar='ARQUIVO', help='arquivo com um N por linha ("-" para a entrada padrão)')
+    parser.add_argument('--workers', type=int, default=None, help='número de processos (padrão: número de CPUs)')
+    parser.add_argument('--timeout', type=float, default=15, help='prazo por número, em segundos')
+    parser.add_argument('--output', metavar='ARQUIVO', help='arquivo de saída JSON lines (padrão: saída padrão)')
+    args = parser.parse_args(argv)
+    if args.batch is None:
+        interactive()
+        return
+    source = sys.stdin if args.batch == '-' else open(args.batch)
+    output = sys.stdout if args.output is None else open(args.output, 'w')
+    try:
+        batch(source, output, args.workers, args.timeout)
+    finally:
+        if source is not sys.stdin: source.close()
+        if output is not sys.stdout: output.close()
+
+if __name__ == '__main__':
+    main()